@@ -1,26 +1,27 @@
 import os
-import subprocess
 
 from bermesio.commons.common import Result, blog
 
 
-def run_command(command, os_env=None, expected_success_data_format=None) -> Result:
+def run_command(command, os_env=None, expected_success_data_format=None, shell=True) -> Result:
     """
     Run a command in the shell and return the result. Note, this blocks the main thread.
 
-    :param command: a string of the command to run
-    :param os_env: a dict of the environment variables to use
+    :param command: a string of the command to run, or a list of the program and its arguments when shell is False
+    :param os_env: a dict of the environment variables to add to the current environment
     :param expected_success_data_format: a function to format the success data
+    :param shell: a flag indicating whether to run the command through the shell, running a program directly avoids
+                  the startup cost of the shell
 
     :return: a Result object indicating if the command is successful, the message generated during the command, and the
              result object returned by subprocess.run()
     """
+    import subprocess  # Imported on first use, only needed when a command is actually run
     try:
         blog(1, f'Running command: {command}')
-        if os_env is not None:
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, check=True, env=os.environ)
-        else:
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, check=True)
+        # Build the environment in one go instead of mutating os.environ, None lets the child inherit os.environ.
+        env = {**os.environ, **os_env} if os_env is not None else None
+        result = subprocess.run(command, shell=shell, capture_output=True, text=True, check=True, env=env)
         if result.returncode == 0:
             if expected_success_data_format is None:
                 return Result(True, result.stdout, result)
@@ -34,7 +35,51 @@ def run_command(command, os_env=None, expected_success_data_format=None) -> Resu
         return Result(False, 'Error: {e}', e)
 
 
+def run_command_streamed(command, expected_success_data_format, os_env=None, shell=True) -> Result:
+    """
+    Run a command and format its stdout while it is being read line by line, without capturing the whole output as a
+    single string first. Note, this blocks the main thread.
+
+    :param command: a string of the command to run, or a list of the program and its arguments when shell is False
+    :param expected_success_data_format: a function to format the success data, which takes an iterable of stdout lines
+    :param os_env: a dict of the environment variables to add to the current environment
+    :param shell: a flag indicating whether to run the command through the shell
+
+    :return: a Result object indicating if the command is successful, the message generated during the command, and the
+             formatted data if successful
+    """
+    import subprocess  # Imported on first use, only needed when a command is actually run
+    import threading
+    try:
+        blog(1, f'Running command streamed: {command}')
+        env = {**os.environ, **os_env} if os_env is not None else None
+        with subprocess.Popen(command, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              env=env) as process:
+            # Drain stderr on a thread while stdout is being read, so the process never blocks on a full stderr pipe
+            stderr_chunks = []
+            stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+            stderr_reader.start()
+            try:
+                data = expected_success_data_format(process.stdout)
+                process.stdout.read()  # Drain what the formatter didn't read, so the process can exit
+            except Exception:
+                process.kill()  # The process may be blocked on a full stdout pipe, which is not read anymore
+                raise
+            finally:
+                stderr_reader.join()
+        stderr = ''.join(stderr_chunks)
+        if process.returncode == 0:
+            return Result(True, '', data)
+        else:
+            blog(4, f'Error running command: {command}, {stderr}')
+            return Result(False, stderr, process)
+    except Exception as e:
+        blog(4, f'Error running command: {command}, {e}')
+        return Result(False, f'Error: {e}', e)
+
+
 def popen_command(command, os_env=None) -> Result:
+    import subprocess  # Imported on first use, only needed when a command is actually run
     try:
         blog(1, f'Running command in Popen: {command}')
         env = os.environ.copy()
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import functools
 import logging
 import os
 from pathlib import Path
@@ -174,6 +175,10 @@ blog = Logger(f'{Config.app_name}', level=logging.DEBUG, include_time=True).log
 
 # region Shared functions
 
+# Names that only contain alphanumeric, underscore, period, and hyphen, compiled once at import
+_valid_name_for_path_pattern = re.compile(r'[a-zA-Z0-9_.-]*')
+
+
 class SharedFunctions:
     """A static class that contains shared functions across the application."""
 
@@ -181,37 +186,39 @@ class SharedFunctions:
         raise Exception('This class should not be instantiated.')
 
     @staticmethod
+    @functools.lru_cache(maxsize=256)
     def is_valid_name_for_path(name: str) -> bool:
         """
         Check if a name is valid, i.e. only contains alphanumeric, underscore, period, and hyphen, and can be used as
-        a file or directory name.
+        a file or directory name. The results are cached, since the same names are checked repeatedly when components
+        are created and restored.
 
         :param name: the name to be checked
 
         :return: True if the name is valid, otherwise False
         """
-        pattern = re.compile(r'^[a-zA-Z0-9_.-]*$')
-        return True if pattern.match(name) else False
+        return _valid_name_for_path_pattern.fullmatch(name) is not None
 
     @staticmethod
     def create_target_dir(target_dir: str or Path) -> Result:
         """
-        A static method that creates a directory.
-        :param target_dir:
-        :return:
+        A static method that creates a directory. The directory is created directly and an existing one is detected from
+        the error, which saves the stat calls of checking the existence before and after creating it.
+
+        :param target_dir: a Path object or a string representing the target directory
+
+        :return: a Result object with the Path object of the directory as the data if successful
         """
         target_dir = Path(target_dir)
-        if not target_dir.exists():
-            try:
-                target_dir.mkdir(parents=True)
-            except OSError as e:
-                return Result(False, f'Error creating {target_dir}: {e}')
-            if target_dir.exists():
-                return Result(True, f'{target_dir} created', target_dir)
-            else:
-                return Result(False, f'Error creating {target_dir}')
-        else:
-            return Result(True, f'{target_dir} already exists', target_dir)
+        try:
+            os.makedirs(target_dir)
+            return Result(True, f'{target_dir} created', target_dir)
+        except FileExistsError:
+            if os.path.isdir(target_dir):
+                return Result(True, f'{target_dir} already exists', target_dir)
+            return Result(False, f'Error creating {target_dir}: a file with the same name exists')
+        except OSError as e:
+            return Result(False, f'Error creating {target_dir}: {e}')
 
     @staticmethod
     def remove_target_path(target_path: str or Path) -> Result:
@@ -253,23 +260,38 @@ class SharedFunctions:
         # Ensure target path uses a valid name
         if not SharedFunctions.is_valid_name_for_path(target_path.name):
             return Result(False, f'Invalid name: {target_path.name}')
-        # Ensure parent directory exists
+        # Ensure parent directory exists, create_target_dir handles an existing directory without checking it first
         parent_path = target_path.parent
-        if ensure_parent_dir and not parent_path.exists():
+        if ensure_parent_dir:
             result = SharedFunctions.create_target_dir(parent_path)
             if not result.ok:
                 return result
-        # Ensure target path is ready
-        if parent_path.exists():
-            if target_path.exists() and delete_existing:
-                result = SharedFunctions.remove_target_path(target_path)
-                if not result.ok:
-                    return result
-            if not target_path.exists():
-                return Result(True, f'{target_path} ready')
-            else:
-                return Result(False, f'Error readying {target_path}')
-        else:
+        elif not parent_path.is_dir():
             return Result(False, f'Parent directory is not ready at {parent_path}')
+        # Ensure target path is ready, remove_target_path verifies the removal itself
+        if target_path.exists():
+            if not delete_existing:
+                return Result(False, f'Error readying {target_path}')
+            result = SharedFunctions.remove_target_path(target_path)
+            if not result.ok:
+                return result
+        return Result(True, f'{target_path} ready')
+
+    @staticmethod
+    def restore_object_state(obj, state):
+        """
+        Restore the state of an unpickled object. The state of a slotted object is a tuple of the __dict__ state and the
+        slots state, while objects pickled before slots were introduced only have a plain dict state. Attributes that
+        cannot be set on the object anymore are skipped.
+
+        :param obj: the unpickled object
+        :param state: the pickled state of the object
+        """
+        dict_state, slots_state = state if isinstance(state, tuple) else (state, None)
+        for key, value in {**(dict_state or {}), **(slots_state or {})}.items():
+            try:
+                setattr(obj, key, value)
+            except AttributeError:
+                pass  # The attribute is not stored per instance anymore, e.g. now a class attribute of a slotted class
 
 # endregion
@@ -0,0 +1,24 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Timeout in seconds for requests made with the shared session
+HTTP_TIMEOUT = 5
+
+
+def _create_http_session() -> requests.Session:
+    """
+    Create a requests session shared across the application. The session keeps connections alive, so repeated requests
+    to the same host, e.g. querying many packages from PyPI, do not pay a handshake per request. HTTPS requests are
+    retried with backoff on rate limiting and server errors.
+
+    :return: a requests.Session object
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+    return session
+
+
+HTTP_SESSION = _create_http_session()
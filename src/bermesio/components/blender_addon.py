@@ -70,8 +70,6 @@ class BlenderAddon(Component):
         :param delete_existing: A flag indicating if the existing addon in the repository should be deleted.
         """
         super().__init__(addon_path)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         self.if_store_in_repo = True
         self.init_params = {'addon_path': addon_path}
 
@@ -217,7 +215,7 @@ class BlenderAddon(Component):
 
         :return: True if equal, otherwise False
         """
-        if issubclass(other.__class__, BlenderAddon):
+        if isinstance(other, BlenderAddon):
             return f'{self.name}|{self.version}' == f'{other.name}|{other.version}'
         return False
 
@@ -1,13 +1,13 @@
+import os
 import sys
 from pathlib import Path
 
 import packaging.version
 
-from bermesio.commons.command import run_command
+from bermesio.commons.command import run_command, run_command_streamed
 from bermesio.commons.common import Result, blog
 from bermesio.components.component import Component
 from bermesio.components.python_package import PythonPackageSet
-from bermesio.config import Config
 
 
 class BlenderProgram(Component):
@@ -27,8 +27,6 @@ class BlenderProgram(Component):
         :param name: a custom name for the Blender program from the user input
         """
         super().__init__(blender_dir_abs_path)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         self.if_store_in_repo = True
         self.init_params = {'blender_dir_path': blender_dir_abs_path, 'name': name}
 
@@ -113,8 +111,8 @@ class BlenderProgram(Component):
 
             :return: a PythonPackageSet object
             """
-            result = run_command(f'"{self.data_path / self.python_exe_path}" -m pip freeze',
-                                 expected_success_data_format=PythonPackageSet)
+            result = run_command_streamed([os.fspath(self.data_path / self.python_exe_path), '-m', 'pip', 'freeze'],
+                                          expected_success_data_format=PythonPackageSet.from_lines, shell=False)
             if result.ok:
                 return result.data
             else:
@@ -24,8 +24,6 @@ class BlenderScript(Component):
         :param script_path: a str or Path object of the script path
         """
         super().__init__(script_path)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         self.if_store_in_repo = True
         self.init_params = {'script_path': script_path}
 
@@ -107,7 +105,7 @@ class BlenderScript(Component):
 
         :return: True if equal, otherwise False
         """
-        if issubclass(other.__class__, BlenderScript):
+        if isinstance(other, BlenderScript):
             return self.name == other.name
 
     def __hash__(self):
@@ -36,6 +36,8 @@ class BlenderSetup(Component):
     setup_startup_script_path = Path('scripts/startup')
     # Additional regular script directory, must be the same as BlenderScript class's
     setup_regular_scripts_path = Path(f'scripts/{Config.app_name.lower()}_scripts')
+    # Deepest directories created for a new setup
+    setup_leaf_dirs = (setup_addon_path, setup_startup_script_path, setup_regular_scripts_path)
 
     # A dict helps to establish the relationship between component classes and their corresponding directories
     component_class_dict = {
@@ -75,8 +77,6 @@ class BlenderSetup(Component):
         """
         data_path = Path(repo_dir) / name  # The data path is a subdirectory in the setup repo directory
         super().__init__(data_path)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         # All BlenderSetup instances must be created in the repo directly. No need to store it.
         self.if_store_in_repo = False
         self.init_params = {'repo_dir': repo_dir, 'name': name}
@@ -115,12 +115,16 @@ class BlenderSetup(Component):
         # Create the setup directory if not exists, this is a new BlenderSetup instance
         if self.data_path is None:
             if SF.is_valid_name_for_path(self.init_params['name']):
-                result = SF.create_target_dir(self.init_params['repo_dir'] / self.init_params['name'])
-                if not result:
-                    return result
+                data_path = Path(self.init_params['repo_dir']) / self.init_params['name']
+                # Create the deepest directories of the setup in one pass, the setup directory itself and the scripts
+                # directory are created along with them.
+                for leaf_dir in self.setup_leaf_dirs:
+                    result = SF.create_target_dir(data_path / leaf_dir)
+                    if not result:
+                        return result
             else:
-                return Result(False, f'Invalid name {self.data_path.name} for the Blender setup.')
-            self.data_path = result.data
+                return Result(False, f'Invalid name {self.init_params["name"]} for the Blender setup.')
+            self.data_path = data_path
         if self.data_path.exists():
             # Initialize the BlenderSetup instance's attributes
             self.name = self.data_path.name
@@ -154,14 +158,14 @@ class BlenderSetup(Component):
             if len(component_dict) == 0:
                 return Result(True)
             results = []
-            for hash_, rel_path in component_dict.component_items():
+            for hash_, rel_path in component_dict.items():
                 if not (self.data_path / rel_path).exists():
                     results.append(Result(False, f'Component {rel_path} not found'))
             return ResultList(results).to_result()
 
         results = []
         # Check Blender config
-        self.setup_json['blender_config'] = get_blender_config_status()
+        self._set_blender_config_status(get_blender_config_status())
 
         # Check addons
         results.append(verify_component_dict(self.setup_json['released_addons']))
@@ -184,6 +188,16 @@ class BlenderSetup(Component):
         else:
             return result
 
+    def _set_blender_config_status(self, status: bool):
+        """
+        Set whether the setup has a Blender config in the setup config, and flag this instance as changed if it differs.
+
+        :param status: True if the setup has a Blender config, otherwise False
+        """
+        if self.setup_json.get('blender_config') != status:
+            self.setup_json['blender_config'] = status
+            self.is_dirty = True
+
     def verify_components_against_repo(self, repo) -> Result:
         raise NotImplementedError
 
@@ -203,10 +217,10 @@ class BlenderSetup(Component):
             if not result:
                 return result
         if blender_config.exists():
-            self.setup_json['blender_config'] = True
+            self._set_blender_config_status(True)
             return Result(True, f'Blender config created at {blender_config}', blender_config)
         else:
-            self.setup_json['blender_config'] = False
+            self._set_blender_config_status(False)
             return Result(False, f'Error adding Blender config to {blender_config}')
 
     def remove_blender_config(self) -> Result:
@@ -224,10 +238,10 @@ class BlenderSetup(Component):
             if not result:
                 return result
         if blender_config.exists():
-            self.setup_json['blender_config'] = True
+            self._set_blender_config_status(True)
             return Result(False, f'Error removing Blender config at {blender_config}', blender_config)
         else:
-            self.setup_json['blender_config'] = False
+            self._set_blender_config_status(False)
             return Result(True, f'Blender config removed at {blender_config}')
 
     def _get_component_belonging_attr(self, component: Component) -> (dict, Path) or (None, None):
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 import sys
 import shutil
+import tempfile
 
 import virtualenv
 
@@ -30,6 +31,8 @@ class BlenderVenv(Component):
     venv_bpy_package_path = Path('Lib/bpy_package')
     # Dev libraries directory in venv
     venv_dev_libraries_path = Path('Lib/dev_libraries')
+    # Python executable path segments in venv
+    venv_python_exe_segments = ('Scripts', 'python.exe') if sys.platform == 'win32' else ('bin', 'python')
     # Path for the pth file managed by this venv
     venv_managed_packages_pth_path = Path(f'Lib/site-packages/_{Config.app_name.lower()}_managed_packages.pth')
 
@@ -42,8 +45,6 @@ class BlenderVenv(Component):
         :param name: a custom name for the Blender virtual environment from the user input
         """
         super().__init__(blender_venv_abs_path)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         # All BlenderVenv instances must be created in the repo directly. No need to store it.
         self.if_store_in_repo = False
         self.init_params = {'blender_venv_path': blender_venv_abs_path, 'name': name}
@@ -157,20 +158,20 @@ class BlenderVenv(Component):
 
         :return: a Result object
         """
-        if sys.platform == "win32":
-            activate_script = self.data_path / 'Scripts' / 'activate.bat'
-            no_deps_str = '--no-deps' if no_deps else ''
+        # Pass the packages in a requirements file, which keeps the command short no matter how many packages there are
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as requirements_file:
+            requirements_file.write('\n'.join(subject.get_installation_args()))
+        try:
+            # Run pip with the venv's Python directly, which has the same effect as activating the venv first but
+            # without spawning a shell to run the activate script.
+            command = [self.get_python_exe_path(), '-m', 'pip', 'install', '-r', requirements_file.name]
+            if no_deps:
+                command.append('--no-deps')
             if installation_path is not None:
-                command = f'cmd.exe /c "{activate_script} && pip install {subject.get_installation_str()} ' \
-                          f'{no_deps_str} --target {installation_path}"'
-            else:
-                command = (f'cmd.exe /c "{activate_script} && pip install {subject.get_installation_str()} '
-                           f'{no_deps_str}"')
-        else:
-            raise NotImplementedError  # TODO: Implement for Linux and Mac, which may use different paths.
-            # activate_script = self.data_path / 'bin' / 'activate'
-            # command = f'source {activate_script} && pip install {subject.get_installation_str()}'
-        return run_command(command)
+                command.extend(['--target', os.fspath(installation_path)])
+            return run_command(command, shell=False)
+        finally:
+            os.remove(requirements_file.name)
 
     @Dillable.save_dill
     def install_bpy_package(self, force: bool = False) -> Result:
@@ -241,6 +242,23 @@ class BlenderVenv(Component):
         else:
             return Result(False, f'The development library {subject.name} is not valid')
 
+    @staticmethod
+    def _get_pth_line(package_path: Path) -> (str, str):
+        """
+        Get the line of a pth file that appends the given package path to sys.path, and the indicator marking the line.
+
+        :param package_path: a Path object of the package path to be appended to sys.path, a relative path is relative
+                             to sys.prefix
+
+        :return: a tuple of the line indicator and the line
+        """
+        line_indicator = f'# venv_managed_path: {package_path.name}'
+        if package_path.is_absolute():
+            line = f'import sys; sys.path.append("{package_path.as_posix()}")  {line_indicator}\n'
+        else:
+            line = f'import sys; sys.path.append(sys.prefix + "{os.sep}{package_path.as_posix()}")  {line_indicator}\n'
+        return line_indicator, line
+
     @staticmethod
     def _add_package_dir_to_pth_file(pth_path: Path, package_path: Path) -> Result:
         """
@@ -253,12 +271,7 @@ class BlenderVenv(Component):
         :return: a Result object
         """
         lines = []
-        line_indicator = f'# venv_managed_path: {package_path.name}'
-        if package_path.is_absolute():
-            line_to_write = f'import sys; sys.path.append("{package_path.as_posix()}")  {line_indicator}\n'
-        else:
-            line_to_write = (f'import sys; sys.path.append(sys.prefix + "{os.sep}{package_path.as_posix()}")  '
-                             f'{line_indicator}\n')
+        line_indicator, line_to_write = BlenderVenv._get_pth_line(package_path)
         if pth_path.exists():
             with open(pth_path, 'r') as f:
                 lines = f.readlines()
@@ -268,13 +281,59 @@ class BlenderVenv(Component):
             f.writelines(lines)
         return Result(True, f'Line "{line_to_write}" written to {pth_path}')
 
+    @staticmethod
+    def _write_pth_file(pth_path: Path, package_paths: [Path]) -> Result:
+        """
+        Write the given pth file in one go with a line for each of the given package paths, replacing its content. The
+        pth file is removed if no package path is given. The write is skipped if the pth file already has the same
+        content, e.g. when launching the same Profile again.
+
+        :param pth_path: a Path object of the pth file
+        :param package_paths: a list of Path objects of the package paths to be appended to sys.path
+
+        :return: a Result object
+        """
+        if not package_paths:
+            return SF.remove_target_path(pth_path)
+        lines = [BlenderVenv._get_pth_line(package_path)[1] for package_path in package_paths]
+        content = ''.join(lines)
+        try:
+            with open(pth_path, 'r') as f:
+                if f.read() == content:
+                    return Result(True, f'{pth_path} is already up to date')
+        except OSError:
+            pass  # Missing or unreadable, so it is written below
+        try:
+            with open(pth_path, 'w') as f:
+                f.write(content)
+        except OSError as e:
+            return Result(False, f'Error writing {pth_path}: {e}')
+        return Result(True, f'{len(lines)} lines written to {pth_path}')
+
+    def get_venv_pth_path(self) -> Path:
+        """
+        Get the path of the pth file managed by this venv in its own site-packages directory.
+
+        :return: a Path object of the venv pth file
+        """
+        return self.data_path / self.venv_managed_packages_pth_path
+
+    def get_blender_pth_path(self) -> Path:
+        """
+        Get the path of the pth file managed by this venv in the associated Blender's site-packages directory.
+
+        :return: a Path object of the Blender pth file
+        """
+        return (self.blender_program.data_path / self.blender_program.python_site_pacakge_dir /
+                self.venv_managed_packages_pth_path.name)
+
     def add_bpy_package_to_venv_pth(self) -> Result:
         """
         Add a line to the venv pth file to append the bpy package path to this venv's sys.path.
 
         :return: a Result object
         """
-        pth_path = self.data_path / self.venv_managed_packages_pth_path
+        pth_path = self.get_venv_pth_path()
         return self._add_package_dir_to_pth_file(pth_path, self.venv_bpy_package_path)
 
     def add_dev_libraries_to_venv_pth(self) -> Result:
@@ -283,7 +342,7 @@ class BlenderVenv(Component):
 
         :return: a Result object
         """
-        pth_path = self.data_path / self.venv_managed_packages_pth_path
+        pth_path = self.get_venv_pth_path()
         return self._add_package_dir_to_pth_file(pth_path, self.data_path / self.venv_dev_libraries_path)
 
     def add_bpy_package_to_blender_pth(self) -> Result:
@@ -294,8 +353,7 @@ class BlenderVenv(Component):
 
         :return: a Result object
         """
-        pth_path = (self.blender_program.data_path / self.blender_program.python_site_pacakge_dir /
-                    self.venv_managed_packages_pth_path.name)
+        pth_path = self.get_blender_pth_path()
         return self._add_package_dir_to_pth_file(pth_path, self.data_path / self.venv_bpy_package_path)
 
     def add_site_packages_to_blender_pth(self) -> Result:
@@ -304,8 +362,7 @@ class BlenderVenv(Component):
 
         :return: a Result object
         """
-        pth_path = (self.blender_program.data_path / self.blender_program.python_site_pacakge_dir /
-                    self.venv_managed_packages_pth_path.name)
+        pth_path = self.get_blender_pth_path()
         return self._add_package_dir_to_pth_file(pth_path, self.data_path / self.venv_site_packages_path)
 
     def add_dev_libraries_to_blender_pth(self) -> Result:
@@ -314,17 +371,54 @@ class BlenderVenv(Component):
 
         :return: a Result object
         """
-        pth_path = (self.blender_program.data_path / self.blender_program.python_site_pacakge_dir /
-                    self.venv_managed_packages_pth_path.name)
+        pth_path = self.get_blender_pth_path()
         return self._add_package_dir_to_pth_file(pth_path, self.data_path / self.venv_dev_libraries_path)
 
+    def write_venv_pth(self, include_bpy: bool, include_dev_libraries: bool) -> Result:
+        """
+        Write the venv pth file in a single write with the selected paths, replacing any previous content. This is the
+        batched equivalent of removing the venv pth file and calling the add_*_to_venv_pth methods.
+
+        :param include_bpy: a flag indicating whether to append the bpy package path
+        :param include_dev_libraries: a flag indicating whether to append the dev libraries path
+
+        :return: a Result object
+        """
+        package_paths = []
+        if include_bpy:
+            package_paths.append(self.venv_bpy_package_path)
+        if include_dev_libraries:
+            package_paths.append(self.data_path / self.venv_dev_libraries_path)
+        return self._write_pth_file(self.get_venv_pth_path(), package_paths)
+
+    def write_blender_pth(self, include_site_packages: bool, include_bpy: bool, include_dev_libraries: bool) -> Result:
+        """
+        Write the associated Blender's pth file in a single write with the selected paths, replacing any previous
+        content. This is the batched equivalent of removing the Blender pth file and calling the add_*_to_blender_pth
+        methods.
+
+        :param include_site_packages: a flag indicating whether to append the site-packages path
+        :param include_bpy: a flag indicating whether to append the bpy package path
+        :param include_dev_libraries: a flag indicating whether to append the dev libraries path
+
+        :return: a Result object
+        """
+        package_paths = []
+        if include_site_packages:
+            package_paths.append(self.data_path / self.venv_site_packages_path)
+        if include_bpy:
+            package_paths.append(self.data_path / self.venv_bpy_package_path)
+        if include_dev_libraries:
+            package_paths.append(self.data_path / self.venv_dev_libraries_path)
+        return self._write_pth_file(self.get_blender_pth_path(), package_paths)
+
     def remove_venv_pth(self) -> Result:
         """
         Remove the venv pth file.
 
         :return: a Result object
         """
-        return SF.remove_target_path(self.data_path / self.venv_managed_packages_pth_path)
+        return SF.remove_target_path(self.get_venv_pth_path())
 
     def remove_blender_pth(self) -> Result:
         """
@@ -332,11 +426,19 @@ class BlenderVenv(Component):
 
         :return: a Result object
         """
-        return SF.remove_target_path(self.blender_program.data_path / self.blender_program.python_site_pacakge_dir /
-                                     self.venv_managed_packages_pth_path.name)
+        return SF.remove_target_path(self.get_blender_pth_path())
 
     # endregion
 
+    def get_python_exe_path(self) -> str:
+        """
+        Get the Python executable path of the virtual environment. The path is joined as a string in one go, since it is
+        only used as a command argument.
+
+        :return: a string of the Python executable path
+        """
+        return os.path.join(self.data_path, *self.venv_python_exe_segments)
+
     def get_activate_script_path(self) -> Path or None:
         """
         Get the activate script path of the virtual environment.
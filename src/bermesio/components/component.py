@@ -1,6 +1,10 @@
+import functools
 import hashlib
+import os
 from pathlib import Path
+import pickle
 import shutil
+import struct
 import sys
 import uuid
 
@@ -16,7 +20,27 @@ class Dillable:
     A base class that has dill related functions.
     """
 
-    dill_extension = '.dil'
+    __slots__ = ('saved_app_version', 'uuid', 'dill_save_dir', 'dill_save_path', 'is_verified', 'is_dirty',
+                 '_pool_key')
+
+    dill_extension = '.dil'  # This will be overriden by subclasses
+
+    # A fixed size header written before the pickled data of a dill file: a magic string, the header version, and the
+    # class name. A file of an unexpected class can be rejected by reading only the header instead of unpickling it.
+    dill_header = struct.Struct('<4sH26s')
+    dill_header_magic = b'BRMZ'
+    dill_header_version = 1
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Set the dill extension of a subclass once when the class is created. A subclass without its own extension in
+        the config uses the extension of its closest base class that has one.
+        """
+        super().__init_subclass__(**kwargs)
+        for class_ in cls.__mro__:
+            if class_.__name__ in Config.dill_extensions:
+                cls.dill_extension = Config.dill_extensions[class_.__name__]
+                break
 
     @property
     def status_dict(self):
@@ -25,27 +49,46 @@ class Dillable:
     def __init__(self):
         self.saved_app_version: packaging.version.Version = Config.app_version
         self.uuid = uuid.uuid4().hex
-        self.dill_extension = '.dil'  # This will be overriden by subclasses
         self.dill_save_dir = None  # This will be set by the repo class
         self.dill_save_path = None  # This is the last saved dill file path
+        # If the object has changed since it was last saved to or loaded from disk. Methods decorated with save_dill
+        # save the object right away, any other change of the saved state must set this flag, or the change is skipped
+        # by the repo saving only the changed components.
+        self.is_dirty = True
+
+    def __setstate__(self, state):
+        """Restore the state of a dill loaded object, including dill files saved before slots were introduced."""
+        SF.restore_object_state(self, state)
 
     def save_to_disk(self) -> Result:
         """
-        Save the object to disk as a dill file. The save file is named after the hash of the object with a specific
-        extension depending on the subclass. All subclasses should have the dill_extension attribute overridden by
-        the Depository class during initialization. All subclasses should have __hash__ implemented.
+        Save the object to disk as a dill file, which is written with stdlib pickle whenever possible. The save file is
+        named after the hash of the object with a specific extension depending on the subclass. The dill_extension
+        attribute of all subclasses is set from the config when the subclass is created. All subclasses should have
+        __hash__ implemented.
 
         :return: a Result object
         """
         if self.dill_save_dir is not None:
             self.dill_save_path = Path(self.dill_save_dir) / f'{str(hash(self)).zfill(16)}{self.dill_extension}'
-            with open(self.dill_save_path, 'wb') as pickle_file:
-                self.saved_app_version = Config.app_version
+            self.saved_app_version = Config.app_version
+            try:
+                # The components only hold plain data, which the much faster stdlib pickle handles. Dill is the fallback
+                # for anything pickle can't serialize, and its loader reads both formats.
                 try:
-                    dill.dump(self, pickle_file)
-                    return Result(True, f'{self.__class__.__name__} saved to {self.dill_save_path}')
-                except Exception as e:
-                    return Result(False, f'Error saving {self.__class__.__name__} to {self.dill_save_path}: {e}')
+                    pickled_data = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+                except (pickle.PicklingError, TypeError, AttributeError):
+                    pickled_data = dill.dumps(self)
+                header = self.dill_header.pack(self.dill_header_magic, self.dill_header_version,
+                                               self.__class__.__name__.encode())
+                # The data is already serialized, a buffered writer passes data larger than its buffer straight through
+                with open(self.dill_save_path, 'wb') as pickle_file:
+                    pickle_file.write(header)
+                    pickle_file.write(pickled_data)
+                self.is_dirty = False
+                return Result(True, f'{self.__class__.__name__} saved to {self.dill_save_path}')
+            except Exception as e:
+                return Result(False, f'Error saving {self.__class__.__name__} to {self.dill_save_path}: {e}')
         else:
             return Result(False, f'Error saving {self.__class__.__name__} to {self.dill_save_path}: save_dir not set')
 
@@ -66,32 +109,80 @@ class Dillable:
         return wrapper
 
     @classmethod
-    def load_from_disk(cls, file_path: str or Path) -> Result:
+    def load_from_disk(cls, file_path: str or Path, verify=True) -> Result:
         """
         Load the dill file from disk, run its verification function and return the loaded instance.
 
         :param file_path: the path of the dill file
+        :param verify: a flag indicating whether to verify the loaded instance, which can be skipped to verify it later
+                       with verify_loaded(), e.g. on another thread than the one loading it
 
         :return: a Result object, the data field contains the loaded instance if successful
         """
         file_path = Path(file_path)
-        if file_path.exists() and file_path.is_file():
-            with open(file_path, 'rb') as pickle_file:
-                loaded_instance = dill.load(pickle_file)
+        if file_path.is_file():  # Also false if the file doesn't exist
+            try:
+                with open(file_path, 'rb', buffering=0) as pickle_file:
+                    header = pickle_file.read(cls.dill_header.size)
+                    if header[:len(cls.dill_header_magic)] == cls.dill_header_magic:
+                        _, header_version, class_name = cls.dill_header.unpack(header)
+                        class_name = class_name.rstrip(b'\0').decode(errors='replace')
+                        if header_version != cls.dill_header_version or class_name not in cls._get_dill_class_names():
+                            return Result(False, f'Dill file of version {header_version} and class {class_name} '
+                                                 f'can\'t be loaded as {cls.__name__}: {file_path}', file_path)
+                        pickled_data = b''
+                    else:
+                        pickled_data = header  # Saved without a header by an earlier version
+                    # Read the rest of the file at once and unpickle from memory, instead of many small buffered reads
+                    loaded_instance = dill.loads(pickled_data + pickle_file.readall())
+            except Exception as e:  # A truncated or otherwise unreadable file can raise many kinds of errors
+                return Result(False, f'Error loading dill file {file_path}: {e}', file_path)
+            loaded_instance.is_dirty = False  # The loaded instance is the same as the one on disk
             # Compare version
             if loaded_instance.saved_app_version != Config.app_version:
                 blog(3, f'Dill file saved with a different version {loaded_instance.saved_app_version}.')
-            # Verify the loaded instance
-            if loaded_instance.verify():
-                loaded_instance.is_verified = True
-                return Result(True, f'{loaded_instance.__class__.__name__} restored from {file_path}', loaded_instance)
-            else:
-                loaded_instance.is_verified = False
-                return Result(True, f'Verification failed for {loaded_instance.__class__.__name__} restored from '
-                                    f'{file_path}', loaded_instance)  # Still return the loaded instance
+            if verify:
+                return loaded_instance.verify_loaded(file_path)
+            loaded_instance.is_verified = False
+            return Result(True, f'{loaded_instance.__class__.__name__} restored from {file_path} without verification',
+                          loaded_instance)
         else:
             return Result(False, f'Dill file not found: {file_path}', file_path)
 
+    def verify_loaded(self, file_path: str or Path) -> Result:
+        """
+        Run the verification function of an instance loaded from disk and record if it is verified.
+
+        :param file_path: the path of the dill file the instance is loaded from
+
+        :return: a Result object, the data field contains the loaded instance, which is returned even if unverified
+        """
+        if self.verify():
+            self.is_verified = True
+            return Result(True, f'{self.__class__.__name__} restored from {file_path}', self)
+        else:
+            self.is_verified = False
+            return Result(True, f'Verification failed for {self.__class__.__name__} restored from {file_path}', self)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_dill_class_names(cls) -> frozenset:
+        """
+        Get the class names that a dill file loaded as this class may have in its header, which are the names of this
+        class and all its subclasses, truncated to fit in the header. They are computed once per class, as all
+        subclasses are defined when their modules are imported, before any dill file is loaded.
+
+        :return: a frozenset of class names
+        """
+        max_length = cls.dill_header.size - struct.calcsize('<4sH')  # The magic string and the version come first
+        class_names = set()
+        classes = [cls]
+        while classes:
+            class_ = classes.pop()
+            class_names.add(class_.__name__[:max_length])
+            classes.extend(class_.__subclasses__())
+        return frozenset(class_names)
+
     def remove_from_disk(self):
         """Remove the dill file from disk."""
         if self.dill_save_path and self.dill_save_path.exists():
@@ -111,6 +202,9 @@ class Dillable:
 
 class Component(Dillable):
 
+    __slots__ = ('name', '_data_path', '_data_path_str', 'source_path', '_repo_rel_path', '_repo_rel_path_str',
+                 'if_store_in_repo', 'is_stored_in_repo', 'platform', 'init_params')
+
     dill_extension = '.dil'  # Extension of the dill file
 
     is_renamable = False  # If the data of this component can be renamed
@@ -131,13 +225,16 @@ class Component(Dillable):
 
         # Perform a preliminary check on data_path and set the paths
         if data_path is not None:  # Some pure configuration class, like Profile, does not have data path
-            data_path = Path(data_path)
+            if not isinstance(data_path, Path):
+                data_path = Path(data_path)
             if data_path.exists():
                 # If the data path is inside the repo, this component is initialized from existing data in the repo.
-                if Config.repo_dir in data_path.parents:
+                data_path_str = os.path.abspath(data_path)
+                repo_dir_prefix = Config.get_repo_dir_prefix()
+                if os.path.normcase(data_path_str).startswith(repo_dir_prefix):
                     self.data_path = data_path
                     self.source_path = None
-                    self.repo_rel_path = data_path.relative_to(Config.repo_dir)
+                    self.repo_rel_path = Path(data_path_str[len(repo_dir_prefix):])
                     self.if_store_in_repo = True
                     self.is_stored_in_repo = True
                 else:
@@ -148,6 +245,31 @@ class Component(Dillable):
             else:
                 self.data_path = None
 
+    @property
+    def data_path(self) -> Path or None:
+        return self._data_path
+
+    @data_path.setter
+    def data_path(self, data_path: Path or None):
+        # Keep the posix string of the path for comparing and hashing without converting the Path object every time.
+        data_path_str = data_path.as_posix() if data_path is not None else None
+        if data_path_str != getattr(self, '_data_path_str', None):
+            self.is_dirty = True  # E.g. the data path is resolved again in the moved repo by verify()
+        self._data_path = data_path
+        self._data_path_str = data_path_str
+
+    @property
+    def repo_rel_path(self) -> Path or None:
+        return self._repo_rel_path
+
+    @repo_rel_path.setter
+    def repo_rel_path(self, repo_rel_path: Path or None):
+        repo_rel_path_str = repo_rel_path.as_posix() if repo_rel_path is not None else None
+        if repo_rel_path_str != getattr(self, '_repo_rel_path_str', None):
+            self.is_dirty = True
+        self._repo_rel_path = repo_rel_path
+        self._repo_rel_path_str = repo_rel_path_str
+
     def create_instance(self) -> Result:
         raise NotImplementedError  # Force the subclass to implement this method.
 
@@ -160,7 +282,7 @@ class Component(Dillable):
         :return: a Result object indicating if the storing is successful
         """
         if self.if_store_in_repo:
-            if Config.repo_dir not in self.data_path.parents:
+            if not Config.is_in_repo_dir(self.data_path):
                 if self.data_path.is_dir():
                     repo_path = Path(repo_dir) / self.name  # Use the component name as the directory name
                 else:
@@ -168,13 +290,14 @@ class Component(Dillable):
                 result = SF.ready_target_path(repo_path)
                 if not result:
                     return result
+                # copyfile uses the platform's fast copy path (sendfile, CopyFile) and skips the metadata copy.
                 try:
                     if self.data_path.is_file():
-                        shutil.copy(self.data_path, repo_path)
+                        shutil.copyfile(self.data_path, repo_path)
                     else:
-                        shutil.copytree(self.data_path, repo_path)
-                except OSError:
-                    pass
+                        shutil.copytree(self.data_path, repo_path, copy_function=shutil.copyfile)
+                except OSError as e:
+                    return Result(False, f'Error storing data to {repo_path}: {e}')
                 # If successfully stored in the repo, update related attributes.
                 if repo_path.exists():
                     self.source_path = self.data_path
@@ -210,19 +333,22 @@ class Component(Dillable):
 
         :return: True if the platform and data path of this instance is the same as the other instance, otherwise False
         """
-        if issubclass(other.__class__, Component):
+        if isinstance(other, Component):
             # Compare repo relative path if stored in repo
-            if self.is_stored_in_repo and self.repo_rel_path is not None:
-                return self.repo_rel_path == other.repo_rel_path
-            return self.data_path == other.data_path
+            if self.is_stored_in_repo and self._repo_rel_path_str is not None:
+                return self._repo_rel_path_str == other._repo_rel_path_str
+            return self._data_path_str == other._data_path_str
         return False
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def get_stable_hash(string: str) -> int:
         """
         Get a stable hash of the object which will be used to compare again sub-repo pool. The hash will be a
         representation of a core string of the object, which is usually the path of the associated data. Due to the
-        integer overflow issue, the hash is sliced every 5 characters and converted to integer.
+        integer overflow issue, the hash is sliced every 5 characters and converted to integer. The hash is cached by
+        the string, so hashing the same component repeatedly, e.g. looking it up and then adding it to a pool, only
+        computes the sha256 once, and a changed component gets a new hash without any invalidation.
         """
         return int(hashlib.sha256(string.encode()).hexdigest()[::5], 16)
 
@@ -235,6 +361,6 @@ class Component(Dillable):
         """
         # If the data is stored in the repo, use the repo relative path to get the hash. This is to enable establishing
         # interdependency between components in a repo that has been moved to another location.
-        if self.is_stored_in_repo and self.repo_rel_path is not None:
-            return self.get_stable_hash(self.repo_rel_path.as_posix())
-        return self.get_stable_hash(self.data_path.as_posix())
+        if self.is_stored_in_repo and self._repo_rel_path_str is not None:
+            return self.get_stable_hash(self._repo_rel_path_str)
+        return self.get_stable_hash(self._data_path_str)
@@ -1,6 +1,7 @@
 from functools import wraps
-import os
+import hashlib
 from pathlib import Path
+import shutil
 
 import dill
 
@@ -11,13 +12,16 @@ class ObjectPool:
     creating duplicate objects based on the same class instantiate arguments. Some classes are expensive to create, like
     BlenderProgram, should use pooled_class decorator to be pooled in this ObjectPool.
     ObjectPool should be used as a static class, and should not be instantiated.
-    ObjectPool also has save and load methods to save the object pool to disk as a dill file, and load the dill file
+    ObjectPool also has save and load methods to save the object pool to disk as dill files, and load the dill files
     from disk. This is to accelerate the startup time of the program, so the expensive objects don't need to be created
-    again.
+    again. The pool is sharded by class, each class has its own sub-pool saved to a separate dill file in save_dir, so
+    only the sub-pool of the changed class is rewritten and sub-pools are only loaded when first needed.
     """
-    save_file_path = Path(__file__).parent / 'object_pool.dill'  # TODO: Need to use a path managed by the app.
+    save_dir = Path(__file__).parent / 'object_pool'  # TODO: Need to use a path managed by the app.
+    save_file_extension = '.dil'
 
-    pool = {}
+    pool = {}  # A dict of sub-pools indexed by class name, each sub-pool is a dict of objects indexed by pool key
+    is_lazy_loading = True  # If a sub-pool not in the pool is loaded from disk when first needed
 
     def __new__(cls):
         """Guard against instantiation."""
@@ -35,51 +39,98 @@ class ObjectPool:
         :return: the key for the object pool
         """
         obj_args_str = ','.join([str(arg) for arg in obj_args]).lower()
-        obj_kwargs_str = ','.join([f'{key}={value}' for key, value in obj_kwargs.component_items()]).lower()
+        # Sort kwargs by key so the same kwargs passed in a different order map to the same key.
+        obj_kwargs_str = ','.join([f'{key}={value}' for key, value in sorted(obj_kwargs.items())]).lower()
         return f'{obj_cls.__name__}|{obj_args_str}|{obj_kwargs_str}'
 
+    @classmethod
+    def _get_sub_pool_save_path(cls, class_name: str) -> Path:
+        """
+        Get the save file path of a class's sub-pool. The file is named after a short hash of the class name to avoid
+        filesystem-unsafe characters and collisions with other files.
+        """
+        return cls.save_dir / f'{hashlib.blake2b(class_name.encode(), digest_size=8).hexdigest()}' \
+                              f'{cls.save_file_extension}'
+
+    @classmethod
+    def _get_sub_pool(cls, class_name: str) -> dict:
+        """Get the sub-pool of a class, load it from disk first if it is not loaded yet."""
+        if class_name not in cls.pool and cls.is_lazy_loading:
+            cls._load_sub_pool(cls._get_sub_pool_save_path(class_name))
+        return cls.pool.get(class_name, {})
+
     @classmethod
     def add(cls, obj, obj_args, obj_kwargs):
         """Add an object to the pool, using the class, args and kwargs as the key."""
+        class_name = obj.__class__.__name__
         pool_key = cls._get_object_pool_key(obj.__class__, obj_args, obj_kwargs)
-        cls.pool[pool_key] = obj
+        sub_pool = cls._get_sub_pool(class_name)
+        sub_pool[pool_key] = obj
+        cls.pool[class_name] = sub_pool
         obj._pool_key = pool_key  # Adding pool_key as an attribute to the object for easy removal.
-        cls.save()
+        cls._save_sub_pool(class_name)
 
     @classmethod
     def remove(cls, obj):
-        """Remove an object from the pool using the pool_key attribute."""
+        """
+        Remove an object from the pool using the pool_key attribute. The sub-pool is saved to disk right away, and an
+        empty sub-pool is kept in the pool, so the removed object is not loaded back from disk.
+        """
         if getattr(obj, '_pool_key', None):
-            del cls.pool[obj._pool_key]
+            class_name = obj.__class__.__name__
+            sub_pool = cls._get_sub_pool(class_name)
+            if sub_pool.pop(obj._pool_key, None) is not None:
+                cls._save_sub_pool(class_name)
 
     @classmethod
     def get(cls, obj_cls, obj_args, obj_kwargs) -> object or None:
         """Get an object from the pool using the class, args and kwargs as the key."""
         pool_key = cls._get_object_pool_key(obj_cls, obj_args, obj_kwargs)
-        return cls.pool.get(pool_key, None)
+        return cls._get_sub_pool(obj_cls.__name__).get(pool_key, None)
 
     @classmethod
     def clear(cls):
+        """Clear the pool in memory. The sub-pools are not loaded from disk again until load() is called."""
         cls.pool = {}
+        cls.is_lazy_loading = False
 
     @classmethod
     def clear_save_file(cls):
-        """Remove the dill file of object pool from disk."""
-        if cls.save_file_path.exists():
-            os.remove(cls.save_file_path)
+        """Remove the dill files of object pool from disk."""
+        if cls.save_dir.exists():
+            shutil.rmtree(cls.save_dir)
+
+    @classmethod
+    def _save_sub_pool(cls, class_name: str):
+        """Save the sub-pool of a class to disk as a dill file, the dill file of an empty sub-pool is removed."""
+        if not cls.pool.get(class_name):
+            cls._get_sub_pool_save_path(class_name).unlink(missing_ok=True)
+            return
+        cls.save_dir.mkdir(parents=True, exist_ok=True)
+        with open(cls._get_sub_pool_save_path(class_name), 'wb') as pickle_file:
+            dill.dump({'class_name': class_name, 'pool': cls.pool.get(class_name, {})}, pickle_file)
+
+    @classmethod
+    def _load_sub_pool(cls, save_path: Path):
+        """Load the dill file of a sub-pool from disk."""
+        if save_path.is_file():
+            with open(save_path, 'rb') as pickle_file:
+                sub_pool_data = dill.load(pickle_file)
+            cls.pool[sub_pool_data['class_name']] = sub_pool_data['pool']
 
     @classmethod
     def save(cls):
-        """Save the object pool to disk as a dill file."""
-        with open(cls.save_file_path, 'wb') as pickle_file:
-            dill.dump(cls.pool, pickle_file)
+        """Save all sub-pools of the object pool to disk as dill files."""
+        for class_name in cls.pool:
+            cls._save_sub_pool(class_name)
 
     @classmethod
     def load(cls):
-        """Load the dill file of object pool from disk."""
-        if cls.save_file_path.exists():
-            with open(cls.save_file_path, 'rb') as pickle_file:
-                cls.pool = dill.load(pickle_file)
+        """Load all dill files of the object pool from disk."""
+        cls.is_lazy_loading = True
+        if cls.save_dir.exists():
+            for save_path in cls.save_dir.glob(f'*{cls.save_file_extension}'):
+                cls._load_sub_pool(save_path)
 
 
 def pooled_class(cls):
@@ -8,10 +8,9 @@ from bermesio.components.blender_program import BlenderProgram
 from bermesio.components.blender_setup import BlenderSetup
 from bermesio.components.blender_venv import BlenderVenv
 from bermesio.components.component import Component, Dillable
-from bermesio.config import Config
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BlenderLaunchConfig:
     """
     A class representing the configuration for launching Blender.
@@ -23,7 +22,7 @@ class BlenderLaunchConfig:
     if_include_venv_local_libs: bool = True
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class VenvLaunchConfig:
     """
     A class representing the configuration for launching Blender venv.
@@ -32,19 +31,23 @@ class VenvLaunchConfig:
     if_include_venv_local_libs: bool = True
 
 
+# Shared default launch configs, which are frozen so they cannot be altered by any caller
+_default_blender_launch_config = BlenderLaunchConfig()
+_default_venv_launch_config = VenvLaunchConfig()
+
+
 class Profile(Component):
     """
     A class representing a Blender profile with a BlenderProgram, a BlenderSetup, and a BlenderVenv. This is the class
     that is used to launch Blender and its venv.
     """
+
     is_renamable = True
     is_duplicable = True
     is_editable = True
 
     def __init__(self, name):
         super().__init__(None)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         self.init_params = {'name': name}
 
     def create_instance(self) -> Result:
@@ -58,10 +61,38 @@ class Profile(Component):
             self.blender_program: BlenderProgram = None
             self.blender_setup: BlenderSetup = None
             self.blender_venv: BlenderVenv = None
+            self.blender_exe_path = None  # Absolute path of the BlenderProgram's executable, set with BlenderProgram
+            self.blender_user_config_env = None  # BLENDER_USER_CONFIG value for the BlenderSetup, set with the setup
+            self.blender_user_scripts_env = None  # BLENDER_USER_SCRIPTS value for the BlenderSetup, set with the setup
             return Result(True, f'Profile {self.name} created', self)
         else:
             return Result(False, f'Invalid name for Profile: {self.name}')
 
+    def _update_blender_exe_path(self):
+        """Update the cached absolute path of the BlenderProgram's executable used for launching Blender."""
+        if self.blender_program is not None:
+            blender_exe_path = self.blender_program.data_path / self.blender_program.blender_exe_path
+        else:
+            blender_exe_path = None
+        # The cached values are not set in a Profile saved by an older version
+        if blender_exe_path != getattr(self, 'blender_exe_path', None):
+            self.blender_exe_path = blender_exe_path
+            self.is_dirty = True
+
+    def _update_blender_setup_envs(self):
+        """Update the cached environment variable values of the BlenderSetup's paths used for launching Blender."""
+        if self.blender_setup is not None:
+            blender_setup_envs = (
+                os.fspath(self.blender_setup.data_path / self.blender_setup.setup_blender_config_path),
+                os.fspath(self.blender_setup.data_path / self.blender_setup.setup_scripts_path),
+            )
+        else:
+            blender_setup_envs = (None, None)
+        if blender_setup_envs != (getattr(self, 'blender_user_config_env', None),
+                                  getattr(self, 'blender_user_scripts_env', None)):
+            self.blender_user_config_env, self.blender_user_scripts_env = blender_setup_envs
+            self.is_dirty = True
+
     @Dillable.save_dill
     def add_component(self, component: Component) -> Result:
         """
@@ -74,12 +105,14 @@ class Profile(Component):
         if isinstance(component, BlenderProgram):
             if component.verify():
                 self.blender_program = component
+                self._update_blender_exe_path()
                 result = Result(True, f'BlenderProgram {component.name} added to Profile {self.name}')
             else:
                 result = Result(False, f'BlenderProgram {component.name} cannot be added to Profile {self.name}')
         elif isinstance(component, BlenderSetup):
             if component.verify():
                 self.blender_setup = component
+                self._update_blender_setup_envs()
                 result = Result(True, f'BlenderSetup {component.name} added to Profile {self.name}')
             else:
                 result = Result(False, f'BlenderSetup {component.name} cannot be added to Profile {self.name}')
@@ -114,9 +147,11 @@ class Profile(Component):
         """
         if component_class == BlenderProgram:
             self.blender_program = None
+            self._update_blender_exe_path()
             return Result(True, f'BlenderProgram cleared from Profile {self.name}')
         elif component_class == BlenderSetup:
             self.blender_setup = None
+            self._update_blender_setup_envs()
             return Result(True, f'BlenderSetup cleared from Profile {self.name}')
         elif component_class == BlenderVenv:
             self.blender_venv = None
@@ -125,7 +160,7 @@ class Profile(Component):
             return Result(False, f'Component type {component_class.__name__} cannot be cleared from Profile '
                                    f'{self.name}')
 
-    def launch_blender(self, launch_config: BlenderLaunchConfig = BlenderLaunchConfig()) -> Result:
+    def launch_blender(self, launch_config: BlenderLaunchConfig = _default_blender_launch_config) -> Result:
         """
         Launch Blender GUI with the specified configuration.
 
@@ -134,49 +169,42 @@ class Profile(Component):
         :return: a Result object indicating if the launching is successful
         """
         if self.blender_program is not None:
-            # Set BlenderSetup's config and scripts as environment variables for Blender to use
+            # Set BlenderSetup's config and scripts as environment variables for Blender to use. The variables are only
+            # passed to the Blender process, the environment of this process is left untouched.
+            launch_env = {}
             if self.blender_setup is not None and launch_config.if_use_blender_setup_config:
-                user_config_path = self.blender_setup.data_path / self.blender_setup.setup_blender_config_path
-                os.environ['BLENDER_USER_CONFIG'] = str(user_config_path)
+                launch_env['BLENDER_USER_CONFIG'] = self.blender_user_config_env
             if self.blender_setup is not None and launch_config.if_use_blender_setup_addons_scripts:
-                user_script_path = self.blender_setup.data_path / self.blender_setup.setup_scripts_path
-                os.environ['BLENDER_USER_SCRIPTS'] = str(user_script_path)
+                launch_env['BLENDER_USER_SCRIPTS'] = self.blender_user_scripts_env
 
-            # Set pth file to include venv's site-packages, bpy, and local libraries for Blender to use
+            # Set pth file to include venv's site-packages, bpy, and local libraries for Blender to use. The pth file is
+            # left untouched if it already has the same content.
             if self.blender_venv is not None:
-                # Always remove the pth file first
-                result = self.blender_venv.remove_blender_pth()
+                result = self.blender_venv.write_blender_pth(launch_config.if_include_venv_site_packages,
+                                                             launch_config.if_include_venv_bpy,
+                                                             launch_config.if_include_venv_local_libs)
                 if not result:
                     return result
-                if launch_config.if_include_venv_site_packages:
-                    result = self.blender_venv.add_site_packages_to_blender_pth()
-                    if not result:
-                        return result
-                if launch_config.if_include_venv_bpy:
-                    result = self.blender_venv.add_bpy_package_to_blender_pth()
-                    if not result:
-                        return result
-                if launch_config.if_include_venv_local_libs:
-                    result = self.blender_venv.add_dev_libraries_to_blender_pth()
-                    if not result:
-                        return result
-
-            # Launch Blender
-            blender_exe_path = self.blender_program.data_path / self.blender_program.blender_exe_path
+
+            # Launch Blender. The launch command runs through a shell, which succeeds even if the executable is missing,
+            # so the cached executable path is checked first.
+            blender_exe_path = self.blender_exe_path
             if blender_exe_path.exists():
                 if sys.platform == "win32":
                     command = f'cmd.exe /k start cmd.exe /c "{blender_exe_path}"'
                 else:
                     raise NotImplementedError
                     # command = f'source {activate_script} && "{blender_exe_path}"'
-                popen_command(command, os_env=os.environ)
+                result = popen_command(command, os_env=launch_env)
+                if not result:
+                    return result
                 return Result(True, f'Blender launched successfully')
             else:
                 return Result(False, f'Blender executable not found at {blender_exe_path}')
         else:
             return Result(False, f'BlenderProgram is not set for Profile {self.name}')
 
-    def configure_venv(self, launch_config: VenvLaunchConfig = VenvLaunchConfig()) -> Result:
+    def configure_venv(self, launch_config: VenvLaunchConfig = _default_venv_launch_config) -> Result:
         """
         Configure the Blender venv associated with this Profile.
 
@@ -186,25 +214,18 @@ class Profile(Component):
         """
         if self.blender_program is not None:
             if self.blender_venv is not None:
-                # Always remove the pth file first
-                result = self.blender_venv.remove_venv_pth()
+                # The pth file is left untouched if it already has the same content
+                result = self.blender_venv.write_venv_pth(launch_config.if_include_venv_bpy,
+                                                          launch_config.if_include_venv_local_libs)
                 if not result:
                     return result
-                if launch_config.if_include_venv_bpy:
-                    result = self.blender_venv.add_bpy_package_to_venv_pth()
-                    if not result:
-                        return result
-                if launch_config.if_include_venv_local_libs:
-                    result = self.blender_venv.add_dev_libraries_to_venv_pth()
-                    if not result:
-                        return result
                 return Result(True, f'Venv configured successfully', self.blender_venv.data_path)
             else:
                 return Result(False, f'Blender venv is not set for Profile {self.name}')
         else:
             return Result(False, f'Blender program is not set for Profile {self.name}')
 
-    def launch_venv(self, launch_config: VenvLaunchConfig = VenvLaunchConfig()) -> Result:
+    def launch_venv(self, launch_config: VenvLaunchConfig = _default_venv_launch_config) -> Result:
         """
         Launch the Blender venv associated with this Profile with the specified configuration.
 
@@ -229,11 +250,14 @@ class Profile(Component):
             return Result(False, f'Blender venv activate script not found')
 
     def verify(self) -> bool:
-        return all([
-            True if self.blender_program is None else self.blender_program.verify(),
-            True if self.blender_setup is None else self.blender_setup.verify(),
-            True if self.blender_venv is None else self.blender_venv.verify(),
-        ])
+        # Short-circuit so the remaining components are not verified once one fails
+        result = ((self.blender_program is None or self.blender_program.verify()) and
+                  (self.blender_setup is None or self.blender_setup.verify()) and
+                  (self.blender_venv is None or self.blender_venv.verify()))
+        # The data paths of the BlenderProgram and BlenderSetup may be updated by their verification
+        self._update_blender_exe_path()
+        self._update_blender_setup_envs()
+        return result
 
     def __str__(self):
         return f'{self.__class__.__name__}: {self.name}'
@@ -246,7 +270,7 @@ class Profile(Component):
 
         :return: True if equal, otherwise False
         """
-        if issubclass(other.__class__, Profile):
+        if isinstance(other, Profile):
             return self.name == other.name
         return False
 
@@ -1,9 +1,9 @@
 import os
 from pathlib import Path
+import time
 
-from bermesio.commons.common import Result, blog, SharedFunctions as SF
+from bermesio.commons.common import Result, ResultList, blog, SharedFunctions as SF
 from bermesio.components.component import Component
-from bermesio.config import Config
 
 
 class PythonDevLibrary(Component):
@@ -14,6 +14,10 @@ class PythonDevLibrary(Component):
     Blender dev environment.
     """
 
+    __slots__ = ('_exists_cache', '_hash')
+
+    exists_cache_ttl = 1.0  # Seconds for which the cached existence of the library path is trusted
+
     def __init__(self, library_path: str or Path, name: str = None):
         """
         Create a PythonDevLibrary object with a custom name if supplied.
@@ -23,13 +27,15 @@ class PythonDevLibrary(Component):
                              name such as "src" or "source". The symlink will use this name as the deployed name.
         """
         super().__init__(library_path)
-        self.dill_extension = Config.get_dill_extension(self)
-        self.__class__.dill_extension = self.dill_extension
         self.if_store_in_repo = False
-        self.is_renamable = False
-        self.is_upgradeable = False
-        self.is_duplicable = False
         self.init_params = {'library_path': library_path, 'name': name}
+        self._exists_cache = None  # A tuple of the time checked and the existence of the library path
+        self._hash = None  # Computed on first use, the data path may not exist when the object is created
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._exists_cache = None  # The existence cached by another process is not valid anymore
+        self._hash = None
 
     def create_instance(self) -> Result:
         """
@@ -46,37 +52,85 @@ class PythonDevLibrary(Component):
                 return Result(False, f'Invalid name {self.name} for the Python development library.')
             return Result(True, 'Python development library instance created successfully', self)
         else:
-            return Result(False, f'Python development library path not found at {self.data_path}')
+            return Result(False, f'Python development library path not found at {self.init_params["library_path"]}')
+
+    def _cached_exists(self) -> bool:
+        """
+        Check if the library path exists, reusing the result of a check made within exists_cache_ttl seconds. This
+        avoids stat calls on the library path when it is verified repeatedly, e.g. by deploying to multiple venvs.
+
+        :return: True if the library path exists, otherwise False
+        """
+        now = time.monotonic()
+        if self._exists_cache is None or now - self._exists_cache[0] > self.exists_cache_ttl:
+            self._exists_cache = (now, os.path.exists(self._data_path_str))
+        return self._exists_cache[1]
+
+    def verify(self) -> bool:
+        """
+        Verify if this PythonDevLibrary object is valid by checking if the library path exists. A development library is
+        never stored in the repo, so its data path is always the library path.
 
-    def deploy(self, deploy_dir: str or Path, delete_existing=False) -> Result:
+        :return: True if the library path exists, otherwise False
+        """
+        return self.data_path is not None and self._cached_exists()
+
+    def deploy(self, deploy_dir: str or Path, delete_existing=False, ensure_deploy_dir=True) -> Result:
         """
         Deploy the development library to the deploy directory as a symlink.
 
         :param deploy_dir: a str or Path object of the path to the deploy directory
         :param delete_existing: a flag indicating whether to delete the existing symlink if exists
+        :param ensure_deploy_dir: a flag indicating whether to create the deploy directory if it doesn't exist,
+                                  otherwise it must exist already
 
         :return: a Result object indicating whether the deployment is successful
         """
-        deploy_dir = Path(deploy_dir)
+        if not isinstance(deploy_dir, Path):
+            deploy_dir = Path(deploy_dir)
         if self.verify():
             deployed_target_path = deploy_dir / self.name
-            result = SF.ready_target_path(deployed_target_path, delete_existing=delete_existing)
+            result = SF.ready_target_path(deployed_target_path, ensure_parent_dir=ensure_deploy_dir,
+                                          delete_existing=delete_existing)
             if not result:
                 return result
+            # A successful os.symlink call is sufficient, no need to check the created symlink afterwards.
             try:
                 os.symlink(self.data_path, deployed_target_path)
+            except FileExistsError:
+                return Result(False, f'Error creating symlink to development library at {deployed_target_path}. The '
+                                     f'target path already exists.')
             except OSError:
                 return Result(False, f'Error creating symlink to development library at {deployed_target_path}. If '
                                      f'you are using Windows, please try again with administrator privilege.')
-            if deployed_target_path.exists():
-                blog(2, f'Symlinked development library {self.name} to {deployed_target_path}')
-                return Result(True, '', deployed_target_path)
-            else:
-                return Result(False, f'Error creating symlink to development library at {deployed_target_path}.')
+            blog(2, f'Symlinked development library {self.name} to {deployed_target_path}')
+            return Result(True, '', deployed_target_path)
         else:
             return Result(False, f'Error symlinking development library {self.name}. The library not found at '
                                  f'{self.data_path}')
 
+    def __eq__(self, other) -> bool:
+        """
+        The equality of 2 PythonDevLibrary instances is determined by the data path, compared with the cached posix
+        string of the path. If both hashes are already cached, different hashes reject the other instance first.
+
+        :param other: another PythonDevLibrary object
+
+        :return: True if the data path of this instance is the same as the other instance, otherwise False
+        """
+        if not isinstance(other, PythonDevLibrary):
+            return False
+        # Only compare cached hashes, computing a hash just for the comparison costs more than comparing the strings
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        return self._data_path_str == other._data_path_str
+
+    def __hash__(self):
+        # The data path of a development library never changes once created, so the hash is computed only once.
+        if self._hash is None:
+            self._hash = super().__hash__()
+        return self._hash
+
     def __str__(self):
         return f'{self.__class__.__name__}: {self.name}'
 
@@ -105,3 +159,24 @@ class PythonDevLibraryManager:
         """
         blog(2, 'Creating a Python development library instance...')
         return PythonDevLibrary(library_path, name=name).create_instance()
+
+    @staticmethod
+    def deploy_many(python_dev_libraries: [PythonDevLibrary], deploy_dir: str or Path,
+                    delete_existing=False) -> ResultList:
+        """
+        Deploy multiple development libraries to the same deploy directory as symlinks. The deploy directory is created
+        once for all libraries, instead of by the deployment of each library.
+
+        :param python_dev_libraries: a list of PythonDevLibrary objects
+        :param deploy_dir: a str or Path object of the path to the deploy directory
+        :param delete_existing: a flag indicating whether to delete the existing symlinks if exist
+
+        :return: a ResultList object of the deployment results of all libraries
+        """
+        result = SF.create_target_dir(deploy_dir)
+        if not result:
+            return ResultList([result])
+        deploy_dir = result.data
+        return ResultList([python_dev_library.deploy(deploy_dir, delete_existing=delete_existing,
+                                                     ensure_deploy_dir=False)
+                           for python_dev_library in python_dev_libraries])
@@ -1,17 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import json
+import os
 import packaging.version
 from pathlib import Path
-import requests
+import re
+import time
 
-from bermesio.commons.common import blog
+from bermesio.commons.common import Result, blog, SharedFunctions as SF
+from bermesio.commons.network import HTTP_SESSION, HTTP_TIMEOUT
+from bermesio.config import Config
+
+
+# Version objects are immutable, so parsed versions are shared across packages with the same version string.
+_parse_version = functools.lru_cache(maxsize=4096)(packaging.version.parse)
+
+# Matches a line of 'pip freeze' output, either in the standard 'package_name==package_version' format captured by the
+# name and version groups, or any other non-empty line captured by the other group.
+_package_str_pattern = re.compile(r'^[ \t]*(?:(?P<name>[A-Za-z0-9_.\-]+)==(?P<version>\S+)|(?P<other>\S.*?))[ \t\r]*$',
+                                  re.MULTILINE)
+
+# Matches a package string in either 'package_name==package_version' or 'package_name' format.
+_name_version_pattern = re.compile(r'\s*(?P<name>[A-Za-z0-9_.\-]+)(?:\s*==\s*(?P<version>\S+))?\s*$')
+
+_json_decoder = json.JSONDecoder()
+
+# The metadata headers used by PythonLocalPackage, other headers are skipped when parsing metadata files
+_metadata_keys = frozenset(('name', 'version', 'summary'))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_metadata_file(metadata_path: str, mtime_ns: int, size: int) -> tuple:
+    """
+    Parse the headers of a package's METADATA or PKG-INFO file. The results are cached by the file path and its stat
+    result, so the same site-packages can be scanned repeatedly without reading unchanged metadata files again.
+
+    :param metadata_path: a string of the metadata file path
+    :param mtime_ns: the modification time of the metadata file in nanoseconds, only used as part of the cache key
+    :param size: the size of the metadata file in bytes, only used as part of the cache key
+
+    :return: a tuple of (key, value) pairs of the used metadata headers, the keys are in lower case
+    """
+    metadata_dict = {}
+    # Only the headers are needed, so the file is read line by line and the description body after them is never read
+    with open(metadata_path, 'r', encoding='utf-8', buffering=65536) as metadata_file:
+        for line in metadata_file:
+            if not line.strip():
+                break
+            key, separator, value = line.partition(':')
+            if not separator:
+                continue
+            key = key.strip().lower()
+            # Only the first occurrence of the key will be kept, which is the desired data.
+            if key in _metadata_keys and key not in metadata_dict:
+                metadata_dict[key] = value.strip()
+                if len(metadata_dict) == len(_metadata_keys):
+                    break
+    return tuple(metadata_dict.items())
 
 
 class PythonPackage:
     """ A base class representing a Python package with essential information. """
+
+    # A package set holds hundreds of packages, slots keep each package small.
+    __slots__ = ('name', 'version', 'summary')
+
     def __init__(self):
         self.name = None
         self.version = None
         self.summary = None
 
+    def __setstate__(self, state):
+        """Restore the state of a dill loaded object, including dill files saved before slots were introduced."""
+        SF.restore_object_state(self, state)
+
     def get_installation_str(self, with_version=True) -> str:
         """
         Get the installation string for this package, which is in the format of 'package_name==package_version'. It also
@@ -28,6 +90,16 @@ class PythonPackage:
         else:
             return ''
 
+    def get_installation_args(self, with_version=True) -> list:
+        """
+        Get the installation arguments for this package, which can be passed to 'pip install' without shell quoting.
+
+        :param with_version: a boolean indicating whether to include the version in the installation argument
+        :return: a list of the installation arguments, empty if the package name is None
+        """
+        installation_str = self.get_installation_str(with_version)
+        return [installation_str] if installation_str else []
+
     def __str__(self):
         return (f'{self.name if self.name is not None else "unknown"}'
                 f'=={self.version if self.version is not None else "unknown"}')
@@ -35,22 +107,29 @@ class PythonPackage:
 
 class PythonLocalPackage(PythonPackage):
 
-    def __init__(self, local_package_path: str or Path):
+    __slots__ = ('local_package_path', 'import_path', 'metadata')
+
+    def __init__(self, local_package_path: str or Path, info_dir: Path = None):
         """
         Initialize a PythonLocalPackage from a local package path. The local package path should be a directory of a
         package installed in any path. The package name and version will be retrieved from the metadata file.
 
         :param local_package_path: a string or Path of the local package path
+        :param info_dir: a Path of the package's dist-info or egg-info directory if already known, otherwise it is
+                         searched for next to the local package path
         """
         super().__init__()
-        self.local_package_path = Path(local_package_path)
+        # Package paths are usually already Path objects when scanned from a site-packages directory
+        if not isinstance(local_package_path, Path):
+            local_package_path = Path(local_package_path)
+        self.local_package_path = local_package_path
         if self.local_package_path.exists():
             self.import_path = self.local_package_path.parent  # The path to import the package
-            self.metadata = self._get_package_metadata()
+            self.metadata = self._get_package_metadata(info_dir)
             if self.metadata is not None:
                 try:
                     self.name = self.metadata['name']
-                    self.version = packaging.version.parse(self.metadata['version'])
+                    self.version = _parse_version(self.metadata['version'])
                     self.summary = self.metadata.get('summary', 'Unknown')
                     # if 'requires-python' in self.metadata:
                     #     self.required_python = packaging.version.parse(self.metadata['requires-python'])
@@ -63,36 +142,32 @@ class PythonLocalPackage(PythonPackage):
         else:
             raise FileNotFoundError(f'Local package not found at {self.local_package_path}')
 
-    def _get_package_metadata(self) -> dict or None:
+    def _get_package_metadata(self, info_dir: Path = None) -> dict or None:
         """
         Get the metadata of a package installed in at a specified path.
 
+        :param info_dir: a Path of the package's dist-info or egg-info directory, searched for if None
+
         :return: a dictionary of the metadata or None if not found
         """
-        # Search for dist-info or egg-info directories
         package_name = self.local_package_path.name
-        info_dir = (list(self.local_package_path.parent.glob(f'{package_name}-*.dist-info'))
-                    + list(self.local_package_path.parent.glob(f'{package_name}-*.egg-info')))
-        if len(info_dir) == 1:
-            info_dir = info_dir[0]
+        if info_dir is not None:
+            info_dirs = [info_dir]
+        else:
+            # Search for dist-info or egg-info directories
+            info_dirs = (list(self.local_package_path.parent.glob(f'{package_name}-*.dist-info'))
+                         + list(self.local_package_path.parent.glob(f'{package_name}-*.egg-info')))
+        if len(info_dirs) == 1:
+            info_dir = info_dirs[0]
             # Search for metadata file
             metadata_path = info_dir / 'METADATA'
             if not metadata_path.exists():
                 metadata_path = info_dir / 'PKG-INFO'
             if metadata_path.exists() and metadata_path.is_file():
-                with open(metadata_path, 'r', encoding='utf-8') as metadata_file:
-                    metadata = metadata_file.readlines()
-                    metadata_dict = {}
-                    for line in metadata:
-                        if line == '\n':
-                            break
-                        if ':' in line:
-                            key, value = line.split(':', 1)
-                            key, value = key.strip().lower(), value.strip()
-                            # Only the first occurrence of the key will be kept, which is the desired data.
-                            if key not in metadata_dict:
-                                metadata_dict[key] = value
-                    return metadata_dict
+                # The stat result is part of the cache key, so a reinstalled package is parsed again
+                metadata_stat = metadata_path.stat()
+                return dict(_parse_metadata_file(str(metadata_path), metadata_stat.st_mtime_ns,
+                                                 metadata_stat.st_size))
             else:
                 blog(3, f'Metadata file not found for {package_name}.')
                 return None
@@ -106,6 +181,9 @@ class PythonPyPIPackage(PythonPackage):
     A class representing a Python package from PyPI with name and package version. Further information can be retrieved
     from PyPI. This is mainly used for installing packages from PyPI.
     """
+
+    __slots__ = ('is_found_on_pypi', 'pypi_info')
+
     def __init__(self, name_version_str: str, get_pypi_info=False):
         """
         Initialize a PythonPyPIPackage from a string of package name and version. The package name and version will be
@@ -121,6 +199,24 @@ class PythonPyPIPackage(PythonPackage):
         if get_pypi_info:
             self.gen_pypi_info()
 
+    @classmethod
+    def from_name_version(cls, name: str, version_str: str) -> 'PythonPyPIPackage':
+        """
+        Create a PythonPyPIPackage from an already separated package name and version string, skipping the format
+        detection of the name version string. The attributes are set directly without calling __init__.
+
+        :param name: a string of the package name
+        :param version_str: a string of the package version
+
+        :return: a PythonPyPIPackage object
+        """
+        package = cls.__new__(cls)
+        package.name = name
+        package.version = _parse_version(version_str)
+        package.summary = None
+        package.is_found_on_pypi, package.pypi_info = None, None  # is_found_on_pypi is None if not checked
+        return package
+
     @staticmethod
     def _get_name_version_from_str(name_version_str: str) -> (str, packaging.version.Version):
         """
@@ -135,31 +231,130 @@ class PythonPyPIPackage(PythonPackage):
         if '@ file:///' in name_version_str:
             blog(3, f'Local package string format, {name_version_str}, is not supported.')
             return None, None
-        # This is the standard format of 'pip freeze'
-        elif '==' in name_version_str:
-            segments = name_version_str.rstrip().split('==')
-            return segments[0].lstrip(), packaging.version.parse(segments[1])
-        # This is a string with only name, mostly used for making query to PyPI
-        elif ' ' not in name_version_str:
-            return name_version_str, None
+        # Both the standard format of 'pip freeze' and a string with only name, mostly used for making query to PyPI,
+        # are matched in one go.
+        match = _name_version_pattern.match(name_version_str)
+        if match is not None:
+            version_str = match['version']
+            return match['name'], _parse_version(version_str) if version_str is not None else None
         # All other formats are not supported
         blog(3, f'Incorrect package format, {name_version_str}.')
         return None, None
 
+    # Packages not found on PyPI are cached for a shorter period, after which PyPI is queried again.
+    pypi_not_found_cache_ttl = 3600
+
+    @staticmethod
+    def _get_pypi_cache_path(name: str) -> Path:
+        """
+        Get the path of the cached PyPI information of a package, which is stored under the cache directory of the app
+        instead of the repository directory.
+
+        :param name: the package name
+
+        :return: a Path of the cache file
+        """
+        return Config.cache_dir / 'pypi' / f'{name.lower()}.json'
+
+    @staticmethod
+    def _load_pypi_cache(cache_path: Path) -> dict or None:
+        """
+        Load the cached PyPI information of a package.
+
+        :param cache_path: a Path of the cache file
+
+        :return: a dictionary of the cached PyPI information, or None if not cached or the cache is unreadable
+        """
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_pypi_cache(cache_path: Path, cache: dict):
+        """
+        Save the PyPI information of a package to the cache. Failing to save the cache is not fatal.
+
+        :param cache_path: a Path of the cache file
+        :param cache: a dictionary of the PyPI information to be cached
+        """
+        try:
+            os.makedirs(cache_path.parent, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as cache_file:
+                json.dump(cache, cache_file)
+        except OSError as e:
+            blog(3, f'Failed to cache PyPI info of {cache_path.stem}: {e}')
+
+    @staticmethod
+    def _decode_pypi_info(response_text: str) -> dict or None:
+        """
+        Decode only the info object from a PyPI JSON API response. The info object is the first key of the response,
+        so decoding stops right after it and the much larger releases and urls objects are never decoded. The whole
+        response is decoded as a fallback if the response does not start with the info object.
+
+        :param response_text: the text of a PyPI JSON API response
+
+        :return: a dictionary of the package info, or None if not found
+        """
+        info_key_index = response_text.find('"info"')
+        if info_key_index != -1 and response_text[:info_key_index].strip() == '{':
+            value_index = response_text.find(':', info_key_index + 6) + 1
+            while response_text[value_index:value_index + 1].isspace():
+                value_index += 1
+            try:
+                pypi_info, _ = _json_decoder.raw_decode(response_text, value_index)
+                if isinstance(pypi_info, dict):
+                    return pypi_info
+            except ValueError:
+                pass
+        try:
+            return json.loads(response_text).get('info', None)
+        except (ValueError, AttributeError):
+            return None
+
     def gen_pypi_info(self):
         """
         Generate a dictionary of PyPI information for the package, including the latest version and the description.
+        The information is cached on disk with the ETag of the response, so unchanged packages are revalidated with a
+        conditional request instead of downloading the information again.
+
+        :return: a Result object indicating if the package is found on PyPI
         """
+        if self.name is None:
+            self.is_found_on_pypi, self.pypi_info = False, None
+            return Result(False, 'Package name is unknown, cannot get PyPI info')
+        cache_path = self._get_pypi_cache_path(self.name)
+        cache = self._load_pypi_cache(cache_path)
+        headers = {}
+        if cache is not None:
+            if not cache.get('is_found_on_pypi'):
+                if time.time() - cache.get('time', 0) < self.pypi_not_found_cache_ttl:
+                    self.is_found_on_pypi, self.pypi_info = False, None
+                    return Result(False, f'{self.name} is not found on PyPI (cached)', if_log_error=False)
+            elif cache.get('etag'):
+                headers['If-None-Match'] = cache['etag']
         api_url = f"https://pypi.org/pypi/{self.name}/json"
-        response = requests.get(api_url)
-        if response.status_code == 200:
-            package_info = response.json()
-            if 'info' in package_info:
-                self.is_found_on_pypi = True
-                self.pypi_info = package_info['info']
-                self.summary = self.pypi_info.get('summary', None)
-                return
+        response = HTTP_SESSION.get(api_url, headers=headers, timeout=HTTP_TIMEOUT)
+        if response.status_code == 304 and cache is not None and cache.get('is_found_on_pypi'):
+            pypi_info = cache['pypi_info']
+        elif response.status_code == 200:
+            # JSON is always UTF-8, decoding the content directly skips the charset detection of response.text
+            pypi_info = self._decode_pypi_info(response.content.decode('utf-8', errors='replace'))
+            if pypi_info is not None:
+                self._save_pypi_cache(cache_path, {'is_found_on_pypi': True, 'etag': response.headers.get('ETag'),
+                                                   'time': time.time(), 'pypi_info': pypi_info})
+        else:
+            pypi_info = None
+            if response.status_code == 404:
+                self._save_pypi_cache(cache_path, {'is_found_on_pypi': False, 'time': time.time()})
+        if pypi_info is not None:
+            self.is_found_on_pypi = True
+            self.pypi_info = pypi_info
+            self.summary = self.pypi_info.get('summary', None)
+            return Result(True)
         self.is_found_on_pypi, self.pypi_info = False, None
+        return Result(False, f'{self.name} is not found on PyPI', if_log_error=False)
 
 
 class PythonPackageSet:
@@ -168,13 +363,15 @@ class PythonPackageSet:
     used to represent a set of Python packages for further installation, which is the reason why 2 arithmetic operators
     are implemented for easy calculation of the union and difference of two PythonPackageSets.
     """
-    def __init__(self, package_set_input: str or Path):
+    def __init__(self, package_set_input: str or Path, get_pypi_info=False):
         """
         Initialize a PythonPackageSet from a string of packages or a directory of packages. The string of packages is
         usually the output of 'pip freeze'. The directory of packages is usually the site-packages directory of a Python
         environment.
 
         :param package_set_input: a string of packages or a Path of the directory of packages
+        :param get_pypi_info: a boolean indicating whether to retrieve further information from PyPI for the packages,
+                              which is done concurrently for the whole set instead of one package at a time
         """
         # When package_set_input is empty, create an empty package set as a container
         if package_set_input == '':
@@ -192,6 +389,8 @@ class PythonPackageSet:
                     raise ValueError(f'Input {package_set_input} is not a directory.')
             else:
                 self.package_dict = self._get_package_dict_from_str(package_set_input)
+        if get_pypi_info:
+            self.populate_pypi_info()
 
     @staticmethod
     def _get_package_dict_from_path(package_set_path: Path) -> dict:
@@ -202,17 +401,19 @@ class PythonPackageSet:
 
         :return: a dictionary of PythonPackage objects
         """
-        # Search for dist-info or egg-info directories
-        package_info_dirs = [child_dir for child_dir in package_set_path.iterdir()
-                             if child_dir.is_dir() and ('dist-info' in child_dir.name or 'egg-info' in child_dir.name)]
-        package_dirs = []
-        # Search for the package directory according to the dist-info or egg-info directory
-        for package_info_dir in package_info_dirs:
-            package_dir = package_info_dir.parent / package_info_dir.name.split('-', 1)[0]
-            if package_dir.exists():
-                package_dirs.append(package_dir)
-        # Create a list of PythonPackage objects from the package directories
-        package_list = [PythonLocalPackage(package_dir) for package_dir in package_dirs]
+        # Scan the directory once, both the dist-info or egg-info directories and the package directories are found
+        # from the same listing
+        with os.scandir(package_set_path) as entries:
+            entries = list(entries)
+        entry_names = {entry.name for entry in entries}
+        package_list = []
+        for entry in entries:
+            if ('dist-info' in entry.name or 'egg-info' in entry.name) and entry.is_dir():
+                # Search for the package directory according to the dist-info or egg-info directory
+                package_name = entry.name.split('-', 1)[0]
+                if package_name in entry_names:
+                    package_list.append(PythonLocalPackage(package_set_path / package_name,
+                                                           info_dir=package_set_path / entry.name))
         return {package.name: package for package in package_list if package.name}  # Filter out invalid ones
 
     @staticmethod
@@ -225,9 +426,46 @@ class PythonPackageSet:
 
         :return: a dictionary of PythonPackage objects
         """
-        package_list = [PythonPyPIPackage(package_str.strip()) for package_str in packages_str.strip().split('\n')]
+        # Scan all lines with a single regex
+        package_list = [PythonPackageSet._get_package_from_match(match)
+                        for match in _package_str_pattern.finditer(packages_str)]
         return {package.name: package for package in package_list if package.name}  # Filter out invalid ones
 
+    @staticmethod
+    def _get_package_from_match(match: re.Match) -> 'PythonPyPIPackage':
+        """
+        Create a PythonPyPIPackage from a line matched by the package string pattern. The standard format lines are
+        created directly from the matched groups, other lines go through the format detection of PythonPyPIPackage.
+
+        :param match: a match of the package string pattern
+
+        :return: a PythonPyPIPackage object
+        """
+        if match['name']:
+            return PythonPyPIPackage.from_name_version(match['name'], match['version'])
+        return PythonPyPIPackage(match['other'])
+
+    @classmethod
+    def from_lines(cls, package_lines) -> 'PythonPackageSet':
+        """
+        Create a PythonPackageSet from an iterable of package lines, such as the stdout of a running 'pip freeze'
+        process. The lines are parsed as they are read, without joining them into a single string first.
+
+        :param package_lines: an iterable of strings, each string is a package in the format of
+                              'package_name==package_version'
+
+        :return: a PythonPackageSet object
+        """
+        package_set = cls('')
+        package_dict = package_set.package_dict
+        for line in package_lines:
+            match = _package_str_pattern.match(line)
+            if match is not None:
+                package = cls._get_package_from_match(match)
+                if package.name:  # Filter out invalid ones
+                    package_dict[package.name] = package
+        return package_set
+
     def add_package(self, package: PythonPackage):
         """
         Add a PythonPackage to the package set.
@@ -251,6 +489,23 @@ class PythonPackageSet:
         else:
             raise TypeError(f'Input {package} is not a PythonPackage.')
 
+    def populate_pypi_info(self, max_concurrency=32):
+        """
+        Generate PyPI information for all PythonPyPIPackage objects in the package set. The queries are I/O bound, so
+        they are issued concurrently over the shared HTTP session. A package whose query fails is left unchecked.
+
+        :param max_concurrency: the maximum number of concurrent queries to PyPI
+        """
+        pypi_packages = [package for package in self.package_dict.values() if isinstance(package, PythonPyPIPackage)]
+        if not pypi_packages:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(pypi_packages))) as executor:
+            futures = [executor.submit(package.gen_pypi_info) for package in pypi_packages]
+        # A failed query only leaves its own package unchecked, instead of aborting the queries of the whole set
+        for package, future in zip(pypi_packages, futures):
+            if future.exception() is not None:
+                blog(3, f'Failed to get PyPI info of {package.name}: {future.exception()}')
+
     def get_installation_str(self) -> str:
         """
         Get the installation string for the package set, which is in the format of 'package_name==package_version
@@ -260,6 +515,32 @@ class PythonPackageSet:
         """
         return ' '.join([package.get_installation_str() for package in self.package_dict.values()])
 
+    def get_installation_args(self) -> list:
+        """
+        Get the installation arguments for the package set, which can be passed to 'pip install' without shell quoting.
+
+        :return: a list of the installation arguments for the contained packages
+        """
+        return [installation_arg for package in self.package_dict.values()
+                for installation_arg in package.get_installation_args()]
+
+    @staticmethod
+    def _is_newer_package(package: PythonPackage, other_package: PythonPackage) -> bool:
+        """
+        Check if a package has a higher version than another package of the same name. A package with an unknown
+        version is never considered newer.
+
+        :param package: a PythonPackage object
+        :param other_package: another PythonPackage object of the same name
+
+        :return: True if the package has a higher version than the other package, otherwise False
+        """
+        version, other_version = package.version, other_package.version
+        # Parsed versions are shared, so the common case of the same version is mostly a cheap identity check
+        if version is other_version or version is None:
+            return False
+        return other_version is None or (version != other_version and version > other_version)
+
     def __add__(self, other: 'PythonPackageSet') -> 'PythonPackageSet':
         """
         Get the union of two package collections, with the version of the package being the latest of the two.
@@ -269,14 +550,12 @@ class PythonPackageSet:
         :return: a new PythonPackageSet with the union of the two PythonPackageSets
         """
         added_package_set = PythonPackageSet('')
-        all_packages = list(self.package_dict.values()) + list(other.package_dict.values())
-        while all_packages:
-            package = all_packages.pop()
-            if package.name in added_package_set.package_dict:
-                if package.label_type > added_package_set.package_dict[package.name].label_type:
-                    added_package_set.package_dict[package.name] = package
-            else:
-                added_package_set.package_dict[package.name] = package
+        package_dict = dict(self.package_dict)
+        for package_name, package in other.package_dict.items():
+            existing_package = package_dict.get(package_name)
+            if existing_package is None or self._is_newer_package(package, existing_package):
+                package_dict[package_name] = package
+        added_package_set.package_dict = package_dict
         return added_package_set
 
     def __sub__(self, other: 'PythonPackageSet') -> 'PythonPackageSet':
@@ -289,13 +568,13 @@ class PythonPackageSet:
         :return: a new PythonPackageSet with the difference of the two PythonPackageSets
         """
         subtracted_package_set = PythonPackageSet('')
-        for package_name, package in self.package_dict.items():
-            if package_name not in other.package_dict:
-                subtracted_package_set.package_dict[package_name] = package
-            else:
-                # Same package but higher version will be preserved
-                if package.label_type > other.package_dict[package_name].label_type:
-                    subtracted_package_set.package_dict[package_name] = self.package_dict[package_name]
+        # Same package but higher version will be preserved
+        other_package_dict = other.package_dict
+        subtracted_package_set.package_dict = {
+            package_name: package for package_name, package in self.package_dict.items()
+            if package_name not in other_package_dict
+            or self._is_newer_package(package, other_package_dict[package_name])
+        }
         return subtracted_package_set
 
     def __str__(self):
@@ -1,8 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 import os
 from pathlib import Path
+import socket
 import tempfile
-
-import requests
+import threading
+import time
 
 from bermesio.commons.common import Result, ResultList, blog, SharedFunctions as SF
 from bermesio.components.blender_addon import BlenderAddon, BlenderReleasedAddon, BlenderDevAddon, BlenderAddonManager
@@ -78,6 +80,14 @@ class Repository:
         },
     }
     sub_repos = {}  # A dict of sub repos indexed by the same keys above
+    # The names of the sub repos indexed by their component classes
+    _sub_repo_name_by_class = {sub_repo_config['class']: sub_repo_name
+                               for sub_repo_name, sub_repo_config in sub_repo_config.items()}
+
+    internet_check_ttl = 60  # Seconds for which the result of the internet connection check is trusted
+    _has_internet_connection = False
+    _internet_checked_at = None
+    _internet_check_thread = None
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -85,33 +95,66 @@ class Repository:
         return cls._instance
 
     def __init__(self, repo_dir: str or Path =None, user_query_fn=None):
+        # __init__ runs on every Repository() call, which returns the same instance once created. Its parameters are
+        # only used by create_instance(), so the created instance and its cached sub repo lookups are left untouched.
+        if self._is_initialized:
+            return
         repo_dir = Path(repo_dir)
         self.init_params = {'repo_dir': repo_dir, 'user_query_fn': user_query_fn}
+        self._sub_repo_by_class = {}
 
     def _is_repository_path_ready(self, repo_dir: Path) -> bool:
         try:
-            # Check if the path exists and is a directory
-            if not repo_dir.exists():
-                os.makedirs(repo_dir)
-            if os.path.exists(repo_dir) and repo_dir.is_dir():
-                testfile = tempfile.TemporaryFile(dir=repo_dir)
-                testfile.close()
-                return True
-        except (OSError, IOError):
+            # Create the directory if needed, an existing file at the path raises FileExistsError. Creating a temporary
+            # file in it then proves it is a writable directory, which os.access cannot tell reliably on Windows.
+            repo_dir.mkdir(parents=True, exist_ok=True)
+            testfile = tempfile.TemporaryFile(dir=repo_dir)
+            testfile.close()
+            return True
+        except OSError:
             pass
         blog(5, f'Repository path {repo_dir} is not accessible.')
         return False
 
     @staticmethod
     def _if_has_internet_connection() -> bool:
+        # A plain TCP connection to a public DNS server is enough to tell, without a DNS lookup or a TLS handshake
         try:
-            response = requests.get("http://www.google.com", timeout=5)
-            return response.status_code == 200
-        except requests.RequestException:
+            with socket.create_connection(('1.1.1.1', 53), timeout=1):
+                return True
+        except OSError:
             pass
         blog(3, f'No internet connection.')
         return False
 
+    @classmethod
+    def _check_internet_connection(cls):
+        cls._has_internet_connection = cls._if_has_internet_connection()
+        cls._internet_checked_at = time.monotonic()
+
+    @classmethod
+    def _check_internet_connection_in_background(cls):
+        """
+        Check the internet connection on a background thread, so the caller is not blocked by the check. Only one check
+        runs at a time.
+        """
+        if cls._internet_check_thread is None or not cls._internet_check_thread.is_alive():
+            cls._internet_check_thread = threading.Thread(target=cls._check_internet_connection, daemon=True)
+            cls._internet_check_thread.start()
+
+    @property
+    def has_internet_connection(self) -> bool:
+        """
+        Whether there is an internet connection. The result is cached for internet_check_ttl seconds, after which the
+        last result is returned while a new check runs in the background. Only the first access waits for a check.
+        """
+        if self._internet_checked_at is None:
+            self._check_internet_connection_in_background()
+            self._internet_check_thread.join()
+        elif time.monotonic() - self._internet_checked_at > self.internet_check_ttl:
+            self._check_internet_connection_in_background()
+        return self._has_internet_connection
+
     def _get_component_save_dir(self, repo_dir) -> Path:
         component_save_dir = repo_dir / self.component_save_dir_name
         result = SF.create_target_dir(component_save_dir)
@@ -131,7 +174,7 @@ class Repository:
                 else:
                     self.repo_dir = Path(Config.repo_dir)
                 self.is_repository_path_ready = self._is_repository_path_ready(self.repo_dir)
-                self.has_internet_connection = self._if_has_internet_connection()
+                self._check_internet_connection_in_background()  # Not needed to create the instance, don't wait
 
                 self.user_query_fn = user_query_fn
 
@@ -148,44 +191,114 @@ class Repository:
         else:
             return Result(True, 'Repository instance already created', self)
 
-    def init_sub_repos(self) -> ResultList:
+    def init_sub_repos(self, reload=False) -> ResultList:
         """
         Initialize all sub repos defined in sub_repo_config. The sub repos will load existing components from disk
         and perform the verification on the components and cleaning of the unloaded or corrupted dill files. The results
-        need to be returned to the caller, so this function is not called in create_instance().
+        need to be returned to the caller, so this function is not called in create_instance(). Without calling this,
+        each sub repo is initialized on its first access instead. Sub repos already initialized are kept as they are,
+        unless reload is set.
+
+        :param reload: a flag indicating whether to recreate the initialized sub repos and reload their components
 
         :return: A ResultList of the results of initializing all sub repos
         """
-        results = []
-        for sub_repo_name, sub_repo_config in self.sub_repo_config.items():
-            result = SubRepository(self.repo_dir, self.component_save_dir, sub_repo_name, sub_repo_config,
-                                   user_query_fn=self.user_query_fn).create_instance()
-            if result:
-                sub_repo = result.data
-                setattr(self, sub_repo_name, sub_repo)
-                self.sub_repos[sub_repo_name] = sub_repo
-                result = sub_repo.load_components_from_disk()
-            results.append(result)
-        return ResultList(results)
+        if reload:
+            self._sub_repo_by_class = {}  # Sub repos are recreated, so the resolved ones are not valid anymore
+        results = {sub_repo_name: self._create_sub_repo(sub_repo_name, sub_repo_config)
+                   for sub_repo_name, sub_repo_config in self.sub_repo_config.items()
+                   if reload or sub_repo_name not in self.sub_repos}
+        sub_repos = [result.data for result in results.values() if result]
+        # The sub repos are independent of each other, so the dill files of all of them are read concurrently on one
+        # shared executor. Handling the loaded files verifies the components and may query the user, which stays on
+        # the calling thread.
+        if sub_repos:
+            dill_files = {sub_repo: sub_repo.scan_dill_files() for sub_repo in sub_repos}
+            with ThreadPoolExecutor(max_workers=SubRepository.max_load_workers) as executor:
+                futures = {sub_repo: [(file, executor.submit(sub_repo.class_.load_from_disk, file, verify=False))
+                                      for file in files] for sub_repo, files in dill_files.items()}
+            loaded_dill_files = {sub_repo: [(file, future.result()) for file, future in sub_repo_futures]
+                                 for sub_repo, sub_repo_futures in futures.items()}
+            results = {sub_repo_name: result.data.handle_loaded_dill_files(loaded_dill_files[result.data])
+                       if result else result for sub_repo_name, result in results.items()}
+        return ResultList([results.get(sub_repo_name, Result(True, f'Sub repo {sub_repo_name} already initialized'))
+                           for sub_repo_name in self.sub_repo_config])
+
+    def _create_sub_repo(self, sub_repo_name: str, sub_repo_config: dict) -> Result:
+        """
+        Create a sub repo without loading its components from disk.
+
+        :param sub_repo_name: the name of the sub repo, which is a key of sub_repo_config
+        :param sub_repo_config: the config of the sub repo
+
+        :return: a Result object of creating the sub repo, the data field contains the sub repo if successful
+        """
+        result = SubRepository(self.repo_dir, self.component_save_dir, sub_repo_name, sub_repo_config,
+                               user_query_fn=self.user_query_fn).create_instance()
+        if result:
+            sub_repo = result.data
+            setattr(self, sub_repo_name, sub_repo)
+            self.sub_repos[sub_repo_name] = sub_repo
+        return result
+
+    def _init_sub_repo(self, sub_repo_name: str, sub_repo_config: dict) -> Result:
+        """
+        Initialize a sub repo and load its existing components from disk.
 
-    def save_all_components(self) -> Result:
-        return ResultList([sub_repo.save_components_to_disk() for sub_repo in self.sub_repos.values()]).to_result()
+        :param sub_repo_name: the name of the sub repo, which is a key of sub_repo_config
+        :param sub_repo_config: the config of the sub repo
+
+        :return: a Result object of creating the sub repo or, if created, of loading its components from disk
+        """
+        result = self._create_sub_repo(sub_repo_name, sub_repo_config)
+        if result:
+            result = result.data.load_components_from_disk()
+        return result
+
+    def __getattr__(self, name):
+        """
+        Initialize a sub repo on its first access if init_sub_repos() has not been called, so a sub repo's components
+        are only loaded from disk when they are actually needed. This is only called when an attribute is not found.
+        """
+        sub_repo_config = self.sub_repo_config.get(name)
+        if sub_repo_config is None:
+            raise AttributeError(f'{self.__class__.__name__} object has no attribute {name}')
+        if not self._is_initialized:
+            result = self.create_instance()
+            if not result:
+                raise AttributeError(f'Error initializing sub repo {name}: {result.message}')
+        result = self._init_sub_repo(name, sub_repo_config)
+        if name not in self.sub_repos:
+            raise AttributeError(f'Error initializing sub repo {name}: {result.message}')
+        return self.sub_repos[name]
+
+    def save_all_components(self, only_dirty=True) -> Result:
+        return ResultList([sub_repo.save_components_to_disk(only_dirty=only_dirty)
+                           for sub_repo in self.sub_repos.values()]).to_result()
 
     def load_all_components(self) -> Result:
         return ResultList([sub_repo.load_components_from_disk() for sub_repo in self.sub_repos.values()]).to_result()
 
     def get_component_class_belonging_sub_repo(self, component_class) -> 'SubRepository' or None:
         """
-        Get the sub repo that the component class belongs to by checking the component class against the sub repo's
-        classes defined in the sub_repo_config.
+        Get the sub repo that the component class belongs to by looking up the component class and its base classes
+        in the sub repo's classes defined in the sub_repo_config. The result is cached per component class.
 
         :param component_class: a component class
 
         :return: the sub repo that the component class belongs to or None
         """
-        for sub_repo_name, sub_repo_config in self.sub_repo_config.items():
-            if issubclass(component_class, sub_repo_config['class']):
-                return getattr(self, sub_repo_name)
+        # The sub repo of a class never changes until the sub repos are recreated, so it is only resolved once
+        sub_repo = self._sub_repo_by_class.get(component_class)
+        if sub_repo is not None:
+            return sub_repo
+        # The classes of the sub repos don't inherit from each other, so the first one in the MRO is the only match
+        for class_ in component_class.__mro__:
+            sub_repo_name = self._sub_repo_name_by_class.get(class_)
+            if sub_repo_name is not None:
+                sub_repo = getattr(self, sub_repo_name)
+                self._sub_repo_by_class[component_class] = sub_repo
+                return sub_repo
         return
 
     def get_component_belonging_sub_repo(self, component) -> 'SubRepository' or None:
@@ -242,7 +355,7 @@ class Repository:
         Update an existing component in the repo with a new component if the new component has a higher version number.
         After updating, update all other components that depend on the updated component.
         """
-        if issubclass(component.__class__, BlenderAddon) or issubclass(component.__class__, BlenderScript):
+        if isinstance(component, (BlenderAddon, BlenderScript)):
             sub_repo = self.get_component_belonging_sub_repo(component)
             return sub_repo.update(component)
         else:
@@ -263,10 +376,14 @@ class Repository:
         """
         if isinstance(blender_venv, BlenderVenv):
             if self.blender_program_repo.pool is not None:
-                # Check if the BlenderProgram of the venv is already in the repo
-                if hash(blender_venv.blender_program) in self.blender_program_repo.pool:
+                # Check if the BlenderProgram of the venv is already in the repo, the pool is indexed by hash so this
+                # is a single lookup
+                blender_program = self.blender_program_repo.pool.get(hash(blender_venv.blender_program))
+                if blender_program is not None:
                     # If found, replace the venv's BlenderProgram with the one in the repo
-                    blender_venv.blender_program = self.blender_program_repo.pool[hash(blender_venv.blender_program)]
+                    if blender_venv.blender_program is not blender_program:
+                        blender_venv.blender_program = blender_program
+                        blender_venv.is_dirty = True
                     return Result(True, f'Blender venv {blender_venv} matched with an existing Blender program in the '
                                         f'repo.')
                 else:
@@ -297,6 +414,11 @@ class Repository:
 
 class SubRepository:
 
+    __slots__ = ('init_params', 'repo_dir', 'component_save_dir', 'name', 'config', 'user_query_fn', 'storage_save_dir',
+                 'class_', 'dill_extension', 'pool')
+
+    max_load_workers = 16  # The maximum number of threads for loading and saving components
+
     def __init__(self, repo_dir: Path, component_save_dir: Path, name: str, config: dict, user_query_fn=None):
         self.init_params = {'repo_dir': repo_dir, 'component_save_dir': component_save_dir, 'name': name,
                             'config': config, 'user_query_fn': user_query_fn}
@@ -321,7 +443,7 @@ class SubRepository:
             else:
                 self.storage_save_dir = None
             self.class_ = self.config['class']
-            self.dill_extension = Config.dill_extensions[self.class_.__name__]
+            self.dill_extension = self.class_.dill_extension
             self.pool = {}
             return Result(True, f'Sub repo {self.name} created successfully', self)
         except Exception as e:
@@ -335,55 +457,110 @@ class SubRepository:
         :return: a Result object of the result of loading components from disk
         """
         if self.component_save_dir:
-            self.pool = {}
-            results = []
-            corrupted_dill_files = []
-            # Collect all dill files of the same extension from disk
-            dill_files = [file for file in self.component_save_dir.iterdir()
-                          if file.suffix == self.dill_extension]
-            # Go through all found dill files
-            while len(dill_files):
-                file = dill_files.pop()
-                result = self.class_.load_from_disk(file)
-                if result:
-                    component = result.data
-                    # Doublecheck the class of the loaded component
-                    if issubclass(component.__class__, self.class_):
-                        # The component pool is indexed by the hash of the component. We do not check if the component
-                        # already exists in the pool, because this method should be only be called when the pool is
-                        # empty.
-                        self.pool[hash(component)] = component
-                        result = Result(True, f'{component} loaded from {file}')
-                    else:
-                        corrupted_dill_files.append(file)
-                        result = Result(False, f'The loaded component is of the type {component.__class__}, '
-                                               f'not the expected type {self.class_}. The file will be removed.')
-                # If failed to load, consider the file to be corrupted
+            return self.handle_loaded_dill_files(self.load_dill_files())
+        else:
+            return Result(False, f'No component save directory found for {self.name}')
+
+    def scan_dill_files(self) -> list:
+        """
+        Scan the component save directory for the dill files of this sub repo's extension.
+
+        :return: a list of path strings of the dill files
+        """
+        if not self.component_save_dir:
+            return []
+        # Collect all dill files of the same extension from disk as path strings, load_from_disk() takes either. The
+        # file type of a scanned entry is known without an extra stat call on most platforms.
+        dill_extension = self.dill_extension
+        with os.scandir(self.component_save_dir) as entries:
+            return [entry.path for entry in entries if entry.name.endswith(dill_extension) and entry.is_file()]
+
+    def load_dill_files(self) -> list:
+        """
+        Load all dill files of this sub repo's extension from the component save directory without verifying the
+        components, which is done by handle_loaded_dill_files(). It doesn't change the sub repo, so it is safe to call
+        from any thread.
+
+        :return: a list of tuples of the dill file path and the Result object of loading it
+        """
+        dill_files = self.scan_dill_files()
+        if not dill_files:
+            return []
+        # Load the dill files concurrently, the loading is mostly waiting for file reads
+        with ThreadPoolExecutor(max_workers=min(self.max_load_workers, len(dill_files))) as executor:
+            results = [executor.submit(self.class_.load_from_disk, file, verify=False) for file in dill_files]
+        return [(file, result.result()) for file, result in zip(dill_files, results)]
+
+    def handle_loaded_dill_files(self, loaded_dill_files: list) -> Result:
+        """
+        Verify the components loaded by load_dill_files(), fill the pool with them and remove the unloaded or corrupted
+        dill files from disk if the user agrees. This may query the user, so it should be called on the main thread.
+
+        :param loaded_dill_files: a list of tuples of the dill file path and the Result object of loading it
+
+        :return: a Result object of the result of loading components from disk
+        """
+        if not self.component_save_dir:
+            return Result(False, f'No component save directory found for {self.name}')
+        self.pool = {}
+        results = []
+        corrupted_dill_files = []
+        # Go through all loaded dill files
+        for file, result in loaded_dill_files:
+            if result:
+                component = result.data
+                # Doublecheck the class of the loaded component
+                if isinstance(component, self.class_):
+                    # The components are verified here rather than on the loading threads, as verification may
+                    # touch other components and the file system
+                    component.verify_loaded(file)
+                    # The component pool is indexed by the hash of the component. We do not check if the component
+                    # already exists in the pool, because the pool is emptied before loading.
+                    self.pool[hash(component)] = component
+                    result = Result(True, f'{component} loaded from {file}')
                 else:
                     corrupted_dill_files.append(file)
-                results.append(result)
-
-            # Remove the corrupted dill files from disk if user agrees
-            if len(corrupted_dill_files) and self.user_query_fn is not None:
-                result = self.user_query_fn('Corrupted Saved Data Found',
-                                            f'{len(corrupted_dill_files)} corrupted saved files found for {self.name}. '
-                                            f'Would you like to remove them?')
-                if result:
-                    for file in corrupted_dill_files:
-                        os.remove(file)
-
-            result_list = ResultList(results)
-            if len(result_list.error_messages):
-                return Result(False, f'Error loading components from disk: {result_list.error_messages}')
+                    result = Result(False, f'The loaded component is of the type {component.__class__}, '
+                                           f'not the expected type {self.class_}. The file will be removed.')
+            # If failed to load, consider the file to be corrupted
             else:
-                return Result(True)
+                corrupted_dill_files.append(file)
+            results.append(result)
+
+        # Remove the corrupted dill files from disk if user agrees
+        if len(corrupted_dill_files) and self.user_query_fn is not None:
+            result = self.user_query_fn('Corrupted Saved Data Found',
+                                        f'{len(corrupted_dill_files)} corrupted saved files found for {self.name}. '
+                                        f'Would you like to remove them?')
+            if result:
+                for file in corrupted_dill_files:
+                    try:
+                        os.unlink(file)
+                    except OSError as e:
+                        # Keep removing the other files, a file left behind is found again on the next loading
+                        blog(3, f'Error removing corrupted saved file {file}: {e}')
+
+        result_list = ResultList(results)
+        if len(result_list.error_messages):
+            return Result(False, f'Error loading components from disk: {result_list.error_messages}')
         else:
-            return Result(False, f'No component save directory found for {self.name}')
+            return Result(True)
 
-    def save_components_to_disk(self) -> Result:
+    def save_components_to_disk(self, only_dirty=True) -> Result:
+        """
+        Save the components in the pool to disk. The dill files are written concurrently.
+
+        :param only_dirty: a flag indicating whether to only save the components changed since last saved or loaded
 
+        :return: a Result object of the result of saving components to disk
+        """
         if self.component_save_dir:
-            return ResultList([component.save_to_disk() for component in self.pool.values()]).to_result()
+            components = [component for component in self.pool.values() if component.is_dirty or not only_dirty]
+            if not components:
+                return Result(True)
+            with ThreadPoolExecutor(max_workers=min(self.max_load_workers, len(components))) as executor:
+                results = list(executor.map(lambda component: component.save_to_disk(), components))
+            return ResultList(results).to_result()
         else:
             return Result(False, f'No component save directory found for {self.name}')
 
@@ -391,10 +568,11 @@ class SubRepository:
         return self.pool.get(hash(component), None)
 
     def add(self, component, query_user=False) -> Result:
-        if issubclass(component.__class__, self.class_):
+        if isinstance(component, self.class_):
             # Check if the component already exists in the pool, note this is comparing the hash of the component,
             # which essentially means the content of the component, not the instance itself.
-            if hash(component) in self.pool:
+            component_hash = hash(component)
+            if component_hash in self.pool:
                 if query_user and self.user_query_fn is not None:
                     result = self.user_query_fn('Add Component', f'{component} already exists in the repo. Would you '
                                                                  f'like to replace it?')
@@ -416,9 +594,12 @@ class SubRepository:
                     result = component.store_in_repo(self.storage_save_dir)
                     if not result:
                         return result
-                # Add the component to the pool after storing it in the repo, for this will change its data path and
-                # hash value
-                self.pool[hash(component)] = component
+                    # Storing the component in the repo changes its data path and hash value, so hash it again
+                    component_hash = hash(component)
+                # Add the component to the pool after storing it in the repo. It stays flagged as changed if saving it
+                # fails, so it is saved again with the other changed components.
+                component.is_dirty = True
+                self.pool[component_hash] = component
                 # Save the component to the repo's component save dir immediately after adding it to the pool
                 result = component.save_to_disk()
                 if not result:
@@ -431,7 +612,7 @@ class SubRepository:
 
     def remove(self, component, query_user=True) -> Result:
         if self.component_save_dir:
-            if issubclass(component.__class__, self.class_):
+            if isinstance(component, self.class_):
                 # Query user if necessary
                 if query_user and self.user_query_fn is not None:
                     result = self.user_query_fn('Remove Component',
@@ -439,10 +620,9 @@ class SubRepository:
                     if not result:
                         return Result(True, f'User cancelled removing {component} from the repo.')
 
-                # Remove the component from the pool, its dill file, and associated data if stored in the repo
-                if hash(component) in self.pool:
-                    # Remove the component from the pool
-                    del self.pool[hash(component)]
+                # Remove the component from the pool, its dill file, and associated data if stored in the repo. Popping
+                # it from the pool hashes the component only once.
+                if self.pool.pop(hash(component), None) is not None:
                     component.remove_from_disk()
                     if component.if_store_in_repo:
                         if component.data_path.exists():
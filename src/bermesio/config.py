@@ -19,6 +19,17 @@ class Config:
     # The directory where the repository is stored. User can change this. The new path will be stored in QSettings and
     # loaded from there to override this value when the application is launched.
     repo_dir = default_repo_dir
+    # The directory where disposable caches are stored, e.g. the PyPI information of packages. It is kept apart from
+    # repo_dir so the repository only holds user data and the caches can be purged by the OS or the user at any time.
+    if sys.platform == 'win32':
+        cache_dir = Path(os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))) / app_name / 'Cache'
+    elif sys.platform == 'darwin':
+        cache_dir = Path(os.path.expanduser('~')) / 'Library' / 'Caches' / app_name
+    else:
+        cache_dir = Path(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))) / app_name.lower()
+    # Cached string prefix of repo_dir used for cheap path containment checks, see get_repo_dir_prefix().
+    _repo_dir_prefix = None
+    _repo_dir_prefix_source = None
 
     dill_extensions = {
         'Profile': '.dpr',
@@ -146,14 +157,20 @@ class Config:
     root_dir: Path = _get_root()
 
     @classmethod
-    def get_dill_extension(cls, component: str) -> str:
-        """Get the dill extension of a component class."""
-        component_class_name = component.__class__.__name__
-        if component_class_name not in cls.dill_extensions:
-            for class_ in component.__class__.__bases__:
-                if class_.__name__ in cls.dill_extensions:
-                    return cls.dill_extensions[class_.__name__]
-        return cls.dill_extensions[component_class_name]
+    def get_repo_dir_prefix(cls) -> str:
+        """
+        Get the normalized absolute repo directory string ending with a path separator. The value is cached and only
+        recomputed when repo_dir is changed, so checking if a path is inside the repo is a simple string prefix test.
+        """
+        if cls._repo_dir_prefix is None or cls._repo_dir_prefix_source != cls.repo_dir:
+            cls._repo_dir_prefix = os.path.join(os.path.normcase(os.path.abspath(cls.repo_dir)), '')
+            cls._repo_dir_prefix_source = cls.repo_dir
+        return cls._repo_dir_prefix
+
+    @classmethod
+    def is_in_repo_dir(cls, path: str or Path) -> bool:
+        """Check if the given path is located inside the repo directory."""
+        return os.path.normcase(os.path.abspath(path)).startswith(cls.get_repo_dir_prefix())
 
     @staticmethod
     def get_component_settings(component_name: str) -> dict:
@@ -24,6 +24,7 @@ def test_python_pypi_pacakge_class():
     assert pkg.is_found_on_pypi, 'PythonPyPIPackage should be able to get the package info from PyPI'
     pkg = PythonPyPIPackage('archspec @ file:///croot/archspec_1697725767277/work')
     assert str(pkg) == 'unknown==unknown', 'PythonPyPIPackage should be able to handle unknown package name and version'
+    assert not pkg.gen_pypi_info(), 'PythonPyPIPackage should fail to get PyPI info without a package name'
     pkg = PythonPyPIPackage('my_package')
     assert str(pkg) == 'my_package==unknown', 'PythonPyPIPackage should be able to handle unknown package version'
     assert is_dillable(pkg), 'PythonPackage should be picklable'
@@ -69,16 +70,19 @@ def test_python_package_set_class():
     """
     p12_packages = PythonPackageSet(p12_packages_str)
     assert len(p12_packages.package_dict) == 13
+    streamed_packages = PythonPackageSet.from_lines(p12_packages_str.splitlines(keepends=True))
+    assert streamed_packages.package_dict.keys() == p12_packages.package_dict.keys(), \
+        'PythonPackageSet should be able to parse the same packages from lines as from a string'
 
     # Test arithmetic operations
     union = b4_packages + p12_packages
     assert len(union.package_dict) == 13
-    assert union.package_dict['numpy'].label_type == Version('1.26.2')
+    assert union.package_dict['numpy'].version == Version('1.26.2')
     difference = b4_packages - p12_packages
     assert len(difference.package_dict) == 0
     difference = p12_packages - b4_packages
     assert len(difference.package_dict) == 2
-    assert difference.package_dict['numpy'].label_type == Version('1.26.2')
+    assert difference.package_dict['numpy'].version == Version('1.26.2')
 
     # Test empty PythonPackageSet with add and remove operations
     empty = PythonPackageSet('')
@@ -21,8 +21,10 @@ def test_blender_setup_class():
     result = repo.add_component(blender_setup)
     assert result, 'Error adding BlenderSetup to repo'
     blender_config_path = blender_setup.data_path / blender_setup.setup_blender_config_path
+    assert not blender_setup.is_dirty, 'BlenderSetup should not be flagged as changed after being saved by the repo'
     result = blender_setup.add_blender_config()
     assert result and blender_config_path.exists(), 'Error adding Blender config'
+    assert blender_setup.is_dirty, 'BlenderSetup should be flagged as changed after adding Blender config'
     result = blender_setup.remove_blender_config()
     assert result and not blender_config_path.exists(), 'Error removing Blender config'
 
@@ -53,6 +53,17 @@ def test_blender_venv_class():
     assert not venv_pth_path.exists(), 'BlenderVenv.remove_venv_pth() should remove the venv pth file'
     blender_venv.remove_blender_pth()
     assert not blender_pth_path.exists(), 'BlenderVenv.remove_blender_pth() should remove the blender pth file'
+    # Test batched pth writing methods
+    assert blender_venv.write_venv_pth(True, True), 'BlenderVenv.write_venv_pth() should write the venv pth file'
+    with open(venv_pth_path, 'r') as f:
+        assert len(f.readlines()) == 2, 'BlenderVenv.write_venv_pth() should write a line for each included path'
+    assert blender_venv.write_blender_pth(True, False, True), 'BlenderVenv.write_blender_pth() should write pth file'
+    with open(blender_pth_path, 'r') as f:
+        assert len(f.readlines()) == 2, 'BlenderVenv.write_blender_pth() should write a line for each included path'
+    blender_venv.write_venv_pth(False, False)
+    assert not venv_pth_path.exists(), 'BlenderVenv.write_venv_pth() should remove the pth file if nothing included'
+    blender_venv.write_blender_pth(False, False, False)
+    assert not blender_pth_path.exists(), 'BlenderVenv.write_blender_pth() should remove pth file if nothing included'
 
     # Test dill-ability
     assert is_dillable(blender_venv), 'BlenderVenv should be picklable'
@@ -1,4 +1,4 @@
-from bermesio.commons.common import blog
+from bermesio.commons.common import blog, SharedFunctions as SF
 
 
 def test_logging():
@@ -8,4 +8,20 @@ def test_logging():
     blog(3, 'This is a warning message')
     blog(4, 'This is an error message')
     blog(5, 'This is a critical message')
-    assert True
\ No newline at end of file
+    assert True
+
+
+def test_restore_object_state():
+    class Slotted:
+        __slots__ = ('name', 'version')
+        obsolete = 'class attribute'
+
+    # A plain dict state pickled before slots were introduced, with an attribute that is now a class attribute
+    obj = Slotted.__new__(Slotted)
+    SF.restore_object_state(obj, {'name': 'a', 'version': 1, 'obsolete': 'instance value'})
+    assert (obj.name, obj.version) == ('a', 1), 'Plain dict state should be restored'
+    assert obj.obsolete == 'class attribute', 'Attributes that cannot be set anymore should be skipped'
+    # The tuple state of a slotted object
+    obj = Slotted.__new__(Slotted)
+    SF.restore_object_state(obj, (None, {'name': 'b', 'version': 2}))
+    assert (obj.name, obj.version) == ('b', 2), 'Slots state should be restored'
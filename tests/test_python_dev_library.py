@@ -2,7 +2,8 @@ from pathlib import Path
 
 import shutil
 
-from bermesio.components.python_dev_library import PythonDevLibraryManager
+from bermesio.components.profile import Profile
+from bermesio.components.python_dev_library import PythonDevLibrary, PythonDevLibraryManager
 
 from testing_common import TESTDATA, is_dillable, get_repo
 
@@ -26,3 +27,9 @@ def test_blender_dev_directory_addon_class():
 
     # Test dill-ability
     assert is_dillable(python_dev_lib), 'PythonDevLibrary should be dillable'
+
+    # Test loading the saved dill file, which is rejected by its header when loaded as another class
+    result = PythonDevLibrary.load_from_disk(python_dev_lib.dill_save_path)
+    assert result and result.data == python_dev_lib, 'PythonDevLibrary should be loaded from its dill file'
+    result = Profile.load_from_disk(python_dev_lib.dill_save_path)
+    assert not result, 'A PythonDevLibrary dill file should not be loaded as a Profile'
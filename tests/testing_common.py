@@ -54,7 +54,7 @@ def get_repo(repo_dir=None, delete_existing=True):
     result = Repository(repo_dir).create_instance()
     if result:
         repo = result.data
-        results = repo.init_sub_repos()
+        results = repo.init_sub_repos(reload=True)  # The repo is a singleton shared by all tests
         if results:
             return repo
         else: